@@ -0,0 +1,177 @@
+"""
+APIリクエストのエラー処理ポリシーモジュール
+エラーの分類、指数バックオフによる再試行、クォータ・認証エラー時のサーキットブレーカー
+"""
+import json
+import random
+import socket
+import time
+from typing import Callable, Dict
+from googleapiclient.errors import HttpError
+import config
+
+try:
+    from httplib2 import HttpLib2Error
+except ImportError:  # httplib2がない環境では通信エラーはOSErrorとして扱う
+    HttpLib2Error = OSError
+
+
+# エラーの分類
+TRANSIENT = 'transient'  # 時間をおけば成功する可能性がある（再試行する）
+FATAL = 'fatal'          # 以降のリクエストもすべて失敗する（実行を止める）
+PERMANENT = 'permanent'  # そのリクエストだけの失敗（再試行しない）
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているためAPIを呼び出さなかったことを示す例外"""
+
+
+class RequestPolicy:
+    """
+    APIリクエストの再試行とサーキットブレーカー
+    
+    一時的なエラー（5xx・429・レート制限・通信エラー）はジッター付きの指数バックオフで
+    再試行する。クォータ超過や認証エラーではサーキットブレーカーを開き、
+    以降の呼び出しは通信せずにCircuitOpenErrorとする。
+    """
+    
+    TRANSIENT_STATUSES = frozenset((429, 500, 502, 503, 504))
+    TRANSIENT_REASONS = frozenset((
+        'rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError',
+    ))
+    FATAL_REASONS = frozenset((
+        'quotaExceeded', 'dailyLimitExceeded', 'keyInvalid', 'keyExpired',
+        'accessNotConfigured', 'ipRefererBlocked', 'authError',
+    ))
+    
+    def __init__(self, max_attempts: int = None, base_delay: float = None,
+                 max_delay: float = None, sleep: Callable[[float], None] = time.sleep):
+        """
+        初期化
+        
+        Args:
+            max_attempts: 1リクエストあたりの最大試行回数（初回を含む）
+            base_delay: バックオフの基準待ち時間（秒）
+            max_delay: バックオフの最大待ち時間（秒）
+            sleep: 待機に使用する関数
+        """
+        self.max_attempts = max_attempts or config.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay or config.RETRY_BASE_DELAY
+        self.max_delay = max_delay or config.RETRY_MAX_DELAY
+        self.sleep = sleep
+        self.open_reason = None
+        self.retries = 0
+    
+    @property
+    def circuit_open(self) -> bool:
+        """サーキットブレーカーが開いている（APIを呼び出さない）場合True"""
+        return self.open_reason is not None
+    
+    def trip(self, exception: Exception):
+        """
+        サーキットブレーカーを開く
+        
+        Args:
+            exception: 原因となったエラー
+        """
+        if self.open_reason is None:
+            self.open_reason = f"{self.error_reason(exception) or 'error'}: {exception}"
+            print(f"APIの呼び出しを停止します（クォータ超過または認証エラー）: {self.open_reason}")
+    
+    def check(self):
+        """サーキットブレーカーが開いている場合はCircuitOpenErrorを送出"""
+        if self.open_reason is not None:
+            raise CircuitOpenError(self.open_reason)
+    
+    def classify(self, exception: Exception) -> str:
+        """
+        エラーを分類
+        
+        Args:
+            exception: 発生したエラー
+        
+        Returns:
+            TRANSIENT / FATAL / PERMANENT のいずれか
+        """
+        if isinstance(exception, CircuitOpenError):
+            return FATAL
+        
+        if isinstance(exception, HttpError):
+            status = getattr(exception.resp, 'status', None)
+            reason = self.error_reason(exception)
+            
+            if reason in self.FATAL_REASONS or status == 401:
+                return FATAL
+            if reason in self.TRANSIENT_REASONS or status in self.TRANSIENT_STATUSES:
+                return TRANSIENT
+            return PERMANENT
+        
+        if isinstance(exception, (socket.timeout, TimeoutError, ConnectionError, HttpLib2Error)):
+            return TRANSIENT
+        
+        return PERMANENT
+    
+    @staticmethod
+    def error_reason(exception: Exception) -> str:
+        """
+        HttpErrorのレスポンスからエラー理由（reason）を取得
+        
+        Args:
+            exception: 発生したエラー
+        
+        Returns:
+            エラー理由。取得できない場合は空文字
+        """
+        content = getattr(exception, 'content', None)
+        if not content:
+            return ''
+        
+        try:
+            if isinstance(content, bytes):
+                content = content.decode('utf-8')
+            error = json.loads(content).get('error', {})
+            errors = error.get('errors') or [{}]
+            return errors[0].get('reason', '') or ''
+        except (ValueError, AttributeError, TypeError):
+            return ''
+    
+    def backoff(self, attempt: int):
+        """
+        再試行前に待機（フルジッター付きの指数バックオフ）
+        
+        Args:
+            attempt: 何回目の再試行か（1から）
+        """
+        self.retries += 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        self.sleep(random.uniform(0, delay))
+    
+    def execute(self, request) -> Dict:
+        """
+        リクエストを実行（一時的なエラーは再試行）
+        
+        Args:
+            request: googleapiclientのHttpRequest
+        
+        Returns:
+            APIレスポンス
+        
+        Raises:
+            CircuitOpenError: サーキットブレーカーが開いている、またはこの呼び出しで開いた場合
+            Exception: 再試行しても成功しなかった場合は最後のエラー
+        """
+        attempt = 0
+        while True:
+            self.check()
+            try:
+                return request.execute()
+            except Exception as e:
+                kind = self.classify(e)
+                if kind == FATAL:
+                    self.trip(e)
+                    raise CircuitOpenError(self.open_reason) from e
+                
+                attempt += 1
+                if kind != TRANSIENT or attempt >= self.max_attempts:
+                    raise
+                self.backoff(attempt)
@@ -17,3 +17,75 @@ DATABASE_PATH = 'youtube_shorts.db'
 YOUTUBE_API_SERVICE_NAME = 'youtube'
 YOUTUBE_API_VERSION = 'v3'
 
+
+# バッチリクエスト設定
+# videos.list / channels.list の1リクエストに指定できるIDの最大数
+BATCH_MAX_IDS_PER_REQUEST = 50
+# 1回のバッチHTTP通信にまとめるリクエストの最大数
+BATCH_MAX_REQUESTS = 50
+
+# 書き込みバッファ設定
+# 1トランザクションで保存する最大件数
+WRITER_BATCH_SIZE = 200
+# 溜まった動画情報を保存するまでの最大待ち時間（秒）
+WRITER_FLUSH_INTERVAL = 2.0
+# 書き込み待ちキューの最大件数（満杯の場合は取得側が待機する）
+WRITER_QUEUE_SIZE = 1000
+
+# 急上昇検知設定
+# 視聴速度（1時間あたりの視聴回数増加）の指数移動平均の平滑化係数
+SPIKE_EWMA_ALPHA = 0.3
+# 平均から標準偏差の何倍以上速い場合に急上昇とみなすか
+SPIKE_Z_THRESHOLD = 3.0
+# 標準偏差の下限（平均速度に対する割合）
+SPIKE_MIN_STDDEV_RATIO = 0.1
+# 判定を始めるまでに必要な速度のサンプル数
+SPIKE_MIN_SAMPLES = 3
+# 急上昇とみなす最低の視聴速度（回/時間）
+SPIKE_MIN_VELOCITY = 100
+# 速度を計算するスナップショット間の最短間隔（時間）
+SPIKE_MIN_INTERVAL_HOURS = 0.1
+
+# APIサーバー設定
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+# キャッシュするレスポンスの最大件数
+SERVER_CACHE_SIZE = 256
+# 一覧系APIで1回に返す最大件数
+SERVER_MAX_LIMIT = 500
+# Access-Control-Allow-Originに設定する値（フロントエンドのオリジン）
+SERVER_CORS_ORIGIN = '*'
+# 「直近N時間」の期間の終点を丸める単位（秒）。同じ単位の間は同じレスポンスをキャッシュから返す
+SERVER_WINDOW_SECONDS = 60
+
+# 読み取りキャッシュ設定
+# DataManagerがメモリ上に保持する動画・チャンネル・統計履歴の最大件数（0でキャッシュしない）
+DATA_CACHE_SIZE = 1024
+
+# コメント同期設定
+# 1回の同期で1動画あたりに取得する最大ページ数（1ページ最大100件）
+COMMENT_MAX_PAGES = 10
+
+# APIリクエストの再試行設定
+# 1リクエストあたりの最大試行回数（初回を含む）
+RETRY_MAX_ATTEMPTS = 5
+# 指数バックオフの基準待ち時間（秒）
+RETRY_BASE_DELAY = 1.0
+# 指数バックオフの最大待ち時間（秒）
+RETRY_MAX_DELAY = 32.0
+
+# プロファイリング設定
+# 設定するとその1回の実行を --profile 付きと同様に計測する（値は出力先のパス。1の場合は既定のパス）
+PROFILE_ENV_VAR = 'SNS_PROFILE'
+# スタックのサンプリング間隔（秒）
+PROFILE_SAMPLE_INTERVAL = 0.005
+# 層ごとに表示する関数の件数
+PROFILE_TOP_N = 10
+
+# 統計履歴のスナップショット設定
+# 列ごとの.npyファイルを保存するディレクトリ
+SNAPSHOT_DIR = 'statistics_snapshot'
+# 書き込み前にメモリに溜める最大行数
+SNAPSHOT_BUFFER_ROWS = 100000
+# update-allの後にスナップショットへ追記する場合True
+SNAPSHOT_AFTER_UPDATE = False
@@ -2,32 +2,281 @@
 データベース管理モジュール
 SQLiteを使用して動画情報を保存・管理
 """
+import math
 import sqlite3
+import threading
+import time
 import json
-from datetime import datetime
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 import config
+from models import Video, StatSnapshot, TIMESTAMP_FIELDS, epoch_to_iso, to_epoch
+
+
+# データベースの形式のバージョン（PRAGMA user_version）
+# 1: 日時をエポック秒で保存し、統計履歴をWITHOUT ROWIDテーブルにした形式
+# 2: コメント同期に途中のページトークンを記録する列を追加した形式
+# 3: 統計履歴に書き込み順の連番（seq）を追加した形式
+# 4: 連番を削除の影響を受けないカウンタ（statistics_seq）から採番する形式
+SCHEMA_VERSION = 4
+
+# 旧形式から移行するテーブル
+MIGRATED_TABLES = ('videos', 'video_statistics', 'channels', 'video_trends', 'video_spikes')
+
+# 既存のテーブルに後から追加した列（テーブル名, 列名, 型）
+ADDED_COLUMNS = (
+    ('comment_sync', 'page_token', 'TEXT'),
+    ('comment_sync', 'pending_published_at', 'INTEGER'),
+    ('video_statistics', 'seq', 'INTEGER'),
+)
+
+# 統計履歴の集計単位ごとのバケット式（recorded_atをローカル時刻の各区間の開始日時に丸める）
+STATISTICS_BUCKETS = {
+    'hour': "strftime('%Y-%m-%dT%H:00:00', recorded_at, 'unixepoch', 'localtime')",
+    'day': "date(recorded_at, 'unixepoch', 'localtime')",
+    'week': "date(recorded_at, 'unixepoch', 'localtime', '-6 days', 'weekday 1')",  # 月曜始まり
+}
+
+
+class _SharedConnection(sqlite3.Connection):
+    """close()を呼んでも閉じない共有接続（読み取り専用モードで使用）"""
+    
+    def close(self):
+        pass
+    
+    def close_shared(self):
+        """共有接続を実際に閉じる"""
+        super().close()
+
+
+class _LRUCache:
+    """件数上限付きのLRUキャッシュ（ヒット・ミス数を記録する）"""
+    
+    def __init__(self, max_size: int):
+        """
+        初期化
+        
+        Args:
+            max_size: 保持する最大件数（0の場合はキャッシュしない）
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        キャッシュから値を取得
+        
+        Args:
+            key: キャッシュキー
+        
+        Returns:
+            キャッシュした値。ない場合はNone
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """
+        キャッシュに値を保存（上限を超えた場合は最も古く使われたものを破棄）
+        
+        Args:
+            key: キャッシュキー
+            value: 保存する値
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key):
+        """
+        キャッシュから値を破棄
+        
+        Args:
+            key: キャッシュキー
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """キャッシュをすべて破棄"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """
+        キャッシュの統計を取得
+        
+        Returns:
+            hits, misses, size, max_size を含む辞書
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
 
 
 class DataManager:
     """データベース管理クラス"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, on_spike: Callable[[Dict], None] = None,
+                 read_only: bool = False, cache_size: int = None):
         """
         初期化
         
         Args:
             db_path: データベースファイルのパス
+            on_spike: 急上昇を検知したときに呼び出す関数（検知情報の辞書を受け取る）
+            read_only: Trueの場合は読み取り専用の接続を1つだけ開いて使い回す
+                       （スレッド間で共有する場合の排他は呼び出し側で行う）
+            cache_size: 動画・チャンネル・統計履歴の読み取りキャッシュの最大件数
+                        （0でキャッシュしない。省略時はconfig.DATA_CACHE_SIZE）
         """
         self.db_path = db_path or config.DATABASE_PATH
-        self.init_database()
+        self.on_spike = on_spike
+        self.read_only = read_only
+        self._shared_conn = None
+        self._data_version = None
+        self._cache = _LRUCache(config.DATA_CACHE_SIZE if cache_size is None else cache_size)
+        
+        if read_only:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            self._shared_conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                                factory=_SharedConnection)
+            version = self._shared_conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self.close()
+                raise ValueError("データベースが旧形式です。先に通常のコマンド（listなど）を実行して移行してください。")
+        else:
+            self.init_database()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        データベース接続を取得
+        
+        Returns:
+            読み取り専用モードでは共有接続、それ以外は新しい接続
+        """
+        if self._shared_conn is not None:
+            return self._shared_conn
+        return sqlite3.connect(self.db_path)
+    
+    def close(self):
+        """読み取り専用モードの共有接続を閉じる"""
+        if self._shared_conn is not None:
+            self._shared_conn.close_shared()
+            self._shared_conn = None
+    
+    def get_data_version(self) -> Optional[int]:
+        """
+        共有接続から見たデータベースの更新バージョンを取得
+        
+        他の接続（別プロセスを含む）がコミットするたびに値が変わる。
+        
+        Returns:
+            PRAGMA data_versionの値。共有接続がない場合はNone
+        """
+        if self._shared_conn is None:
+            return None
+        
+        version = self._shared_conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            # 他の接続が書き込んだので読み取りキャッシュは使えない
+            self._cache.clear()
+            self._data_version = version
+        return version
+    
+    def cache_stats(self) -> Dict:
+        """
+        読み取りキャッシュの統計を取得
+        
+        Returns:
+            hits, misses, size, max_size を含む辞書
+        """
+        return self._cache.stats()
+    
+    def _cache_get(self, key: tuple):
+        """
+        読み取りキャッシュから取得
+        
+        読み取り専用モードでは、他の接続（別プロセスを含む）が書き込んでいれば
+        キャッシュを破棄してから参照する。
+        
+        Args:
+            key: キャッシュキー
+        
+        Returns:
+            キャッシュされた値。ない場合はNone
+        """
+        if self._shared_conn is not None:
+            self.get_data_version()
+        return self._cache.get(key)
+    
+    def _invalidate_video(self, video_id: str):
+        """
+        動画に関する読み取りキャッシュを破棄
+        
+        Args:
+            video_id: 動画ID
+        """
+        self._cache.pop(('video', video_id))
+        self._cache.pop(('history', video_id))
     
     def init_database(self):
-        """データベースとテーブルを初期化"""
+        """データベースとテーブルを初期化（旧形式のデータベースは移行する）"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # 動画情報テーブル
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos'")
+        # 日時が文字列の形式（バージョン0）からはテーブルを作り直して移行する
+        migrate = version < 1 and cursor.fetchone() is not None
+        
+        if migrate:
+            # 移行は1つのトランザクションで行い、途中で失敗した場合は元に戻す
+            cursor.execute('BEGIN')
+            self._migrate_to_epoch(cursor)
+        else:
+            self._add_columns(cursor)
+            self._create_tables(cursor)
+        
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        
+        conn.commit()
+        
+        if migrate:
+            # 移行で空いた領域を解放
+            conn.execute('VACUUM')
+            print("データベースを新しい形式に移行しました。")
+        
+        conn.close()
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """
+        テーブルとインデックスを作成（存在しないものだけ）
+        
+        Args:
+            cursor: 作成に使用するカーソル
+        """
+        # 動画情報テーブル（日時はエポック秒。published_atのみAPIが返すUTCのISO 8601文字列）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS videos (
                 video_id TEXT PRIMARY KEY,
@@ -43,23 +292,38 @@ class DataManager:
                 thumbnail_url TEXT,
                 tags TEXT,
                 category_id TEXT,
-                created_at TEXT,
-                updated_at TEXT
+                created_at INTEGER,
+                updated_at INTEGER
             )
         ''')
         
         # 動画統計履歴テーブル（時系列データを保存）
+        # (video_id, recorded_at) でクラスタ化し、動画ごとの期間スキャンを1回の範囲読み取りにする
+        # seqは書き込み順の連番（コミット順に増えるため、スナップショットの差分取得に使用する）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS video_statistics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id TEXT,
+                video_id TEXT NOT NULL,
+                recorded_at INTEGER NOT NULL,
                 view_count INTEGER,
                 like_count INTEGER,
                 comment_count INTEGER,
-                recorded_at TEXT,
-                FOREIGN KEY (video_id) REFERENCES videos (video_id)
+                seq INTEGER,
+                PRIMARY KEY (video_id, recorded_at)
+            ) WITHOUT ROWID
+        ''')
+        
+        # 統計履歴の連番のカウンタ（1行のみ）
+        # 最大の連番の行が削除されても同じ番号を再利用しないよう、テーブルとは別に保持する
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS statistics_seq (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                value INTEGER NOT NULL
             )
         ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO statistics_seq (id, value)
+            SELECT 1, IFNULL(MAX(seq), 0) FROM video_statistics
+        ''')
         
         # チャンネル情報テーブル
         cursor.execute('''
@@ -69,24 +333,184 @@ class DataManager:
                 subscriber_count INTEGER,
                 video_count INTEGER,
                 view_count INTEGER,
-                created_at TEXT,
-                updated_at TEXT
+                created_at INTEGER,
+                updated_at INTEGER
+            )
+        ''')
+        
+        # 視聴速度の傾向テーブル（急上昇検知用の逐次更新される状態）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_trends (
+                video_id TEXT PRIMARY KEY,
+                last_view_count INTEGER,
+                last_recorded_at INTEGER,
+                velocity REAL,
+                velocity_mean REAL,
+                velocity_var REAL,
+                sample_count INTEGER,
+                FOREIGN KEY (video_id) REFERENCES videos (video_id)
+            )
+        ''')
+        
+        # 急上昇の検知履歴テーブル
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_spikes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT,
+                view_count INTEGER,
+                velocity REAL,
+                expected_velocity REAL,
+                z_score REAL,
+                detected_at INTEGER,
+                FOREIGN KEY (video_id) REFERENCES videos (video_id)
+            )
+        ''')
+        
+        # コメントテーブル（トップレベルのコメントスレッド）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS comments (
+                comment_id TEXT PRIMARY KEY,
+                video_id TEXT,
+                author TEXT,
+                text TEXT,
+                like_count INTEGER,
+                reply_count INTEGER,
+                published_at INTEGER,
+                updated_at INTEGER,
+                FOREIGN KEY (video_id) REFERENCES videos (video_id)
+            )
+        ''')
+        
+        # コメント同期の状態テーブル（動画ごとの取得済み位置）
+        # last_published_at: この日時までのコメントはすべて取得済み
+        # page_token / pending_published_at: ページ数の上限で止まった場合の続きの位置と、
+        #   それまでに取得した最新の投稿日時（続きを取得し終えたらlast_published_atに反映）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS comment_sync (
+                video_id TEXT PRIMARY KEY,
+                last_published_at INTEGER,
+                synced_comment_count INTEGER,
+                synced_at INTEGER,
+                page_token TEXT,
+                pending_published_at INTEGER,
+                FOREIGN KEY (video_id) REFERENCES videos (video_id)
+            )
+        ''')
+        
+        # 前回の一括更新で取得できなかった動画（update-all --resumeで再取得する）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fetch_failures (
+                video_id TEXT PRIMARY KEY,
+                error TEXT,
+                failed_at INTEGER,
+                FOREIGN KEY (video_id) REFERENCES videos (video_id)
             )
         ''')
         
         # インデックスを作成
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_video_statistics_video_id 
-            ON video_statistics(video_id)
+            CREATE INDEX IF NOT EXISTS idx_comments_video_id_published_at
+            ON comments(video_id, published_at)
         ''')
         
+        # 全動画を対象にした期間の絞り込み（急上昇の一覧など）用
+        # WITHOUT ROWIDテーブルのため、インデックスには主キーのvideo_idも含まれる
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_video_statistics_recorded_at 
+            CREATE INDEX IF NOT EXISTS idx_video_statistics_recorded_at
             ON video_statistics(recorded_at)
         ''')
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_video_statistics_seq
+            ON video_statistics(seq)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_video_spikes_detected_at
+            ON video_spikes(detected_at)
+        ''')
+    
+    def _add_columns(self, cursor: sqlite3.Cursor):
+        """
+        既存のテーブルに後から追加した列を作成（存在しないものだけ）
+        
+        Args:
+            cursor: 作成に使用するカーソル
+        """
+        for table, column, column_type in ADDED_COLUMNS:
+            cursor.execute(f'PRAGMA table_info({table})')
+            columns = [row[1] for row in cursor.fetchall()]
+            # テーブル自体がない場合は_create_tablesで新しい形式のまま作成される
+            if columns and column not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+    
+    def _migrate_to_epoch(self, cursor: sqlite3.Cursor):
+        """
+        旧形式（日時がISO 8601文字列、統計履歴がAUTOINCREMENTの行）のテーブルを
+        エポック秒・WITHOUT ROWIDの形式に作り直す（コミットは呼び出し側で行う）
+        
+        Args:
+            cursor: 移行に使用するカーソル
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in cursor.fetchall()}
+        migrated = [table for table in MIGRATED_TABLES if table in tables]
+        
+        # 旧テーブルを退避し、インデックスも合わせて削除
+        for table in migrated:
+            cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+        cursor.execute('DROP INDEX IF EXISTS idx_video_statistics_video_id')
+        cursor.execute('DROP INDEX IF EXISTS idx_video_statistics_recorded_at')  # 新しい形式で作り直す
+        cursor.execute('DROP INDEX IF EXISTS idx_video_spikes_detected_at')
+        
+        self._create_tables(cursor)
+        
+        # ローカル時刻のISO 8601文字列をエポック秒に変換するSQL式
+        def epoch(column):
+            return f"CAST(strftime('%s', NULLIF({column}, ''), 'utc') AS INTEGER)"
+        
+        copies = {
+            'videos': f'''
+                INSERT INTO videos
+                SELECT video_id, title, description, channel_id, channel_title,
+                       published_at, duration, view_count, like_count,
+                       comment_count, thumbnail_url, tags, category_id,
+                       {epoch('created_at')}, {epoch('updated_at')}
+                FROM videos_old
+            ''',
+            # 同じ秒に記録された行は後のものを残す
+            'video_statistics': f'''
+                INSERT OR REPLACE INTO video_statistics (
+                    video_id, recorded_at, view_count, like_count, comment_count
+                )
+                SELECT video_id, {epoch('recorded_at')}, view_count, like_count, comment_count
+                FROM video_statistics_old
+                WHERE video_id IS NOT NULL AND {epoch('recorded_at')} IS NOT NULL
+                ORDER BY id
+            ''',
+            'channels': f'''
+                INSERT INTO channels
+                SELECT channel_id, channel_title, subscriber_count, video_count, view_count,
+                       {epoch('created_at')}, {epoch('updated_at')}
+                FROM channels_old
+            ''',
+            'video_trends': f'''
+                INSERT INTO video_trends
+                SELECT video_id, last_view_count, {epoch('last_recorded_at')},
+                       velocity, velocity_mean, velocity_var, sample_count
+                FROM video_trends_old
+            ''',
+            'video_spikes': f'''
+                INSERT INTO video_spikes
+                SELECT id, video_id, view_count, velocity, expected_velocity, z_score,
+                       {epoch('detected_at')}
+                FROM video_spikes_old
+            ''',
+        }
+        
+        for table in migrated:
+            cursor.execute(copies[table])
+            cursor.execute(f'DROP TABLE {table}_old')
     
     def save_video(self, video_info: Dict) -> bool:
         """
@@ -99,97 +523,261 @@ class DataManager:
             成功した場合True
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
-            now = datetime.now().isoformat()
+            now = int(time.time())
             
-            # 既存の動画かチェック
-            cursor.execute('SELECT video_id FROM videos WHERE video_id = ?', 
-                         (video_info['video_id'],))
-            exists = cursor.fetchone()
+            spike = self._write_video(cursor, video_info, now)
             
-            if exists:
-                # 更新
-                cursor.execute('''
-                    UPDATE videos SET
-                        title = ?,
-                        description = ?,
-                        channel_id = ?,
-                        channel_title = ?,
-                        published_at = ?,
-                        duration = ?,
-                        view_count = ?,
-                        like_count = ?,
-                        comment_count = ?,
-                        thumbnail_url = ?,
-                        tags = ?,
-                        category_id = ?,
-                        updated_at = ?
-                    WHERE video_id = ?
-                ''', (
-                    video_info.get('title', ''),
-                    video_info.get('description', ''),
-                    video_info.get('channel_id', ''),
-                    video_info.get('channel_title', ''),
-                    video_info.get('published_at', ''),
-                    video_info.get('duration', 0),
-                    video_info.get('view_count', 0),
-                    video_info.get('like_count', 0),
-                    video_info.get('comment_count', 0),
-                    video_info.get('thumbnail_url', ''),
-                    video_info.get('tags', ''),
-                    video_info.get('category_id', ''),
-                    now,
-                    video_info['video_id']
-                ))
-            else:
-                # 新規作成
-                cursor.execute('''
-                    INSERT INTO videos (
-                        video_id, title, description, channel_id, channel_title,
-                        published_at, duration, view_count, like_count,
-                        comment_count, thumbnail_url, tags, category_id,
-                        created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    video_info['video_id'],
-                    video_info.get('title', ''),
-                    video_info.get('description', ''),
-                    video_info.get('channel_id', ''),
-                    video_info.get('channel_title', ''),
-                    video_info.get('published_at', ''),
-                    video_info.get('duration', 0),
-                    video_info.get('view_count', 0),
-                    video_info.get('like_count', 0),
-                    video_info.get('comment_count', 0),
-                    video_info.get('thumbnail_url', ''),
-                    video_info.get('tags', ''),
-                    video_info.get('category_id', ''),
-                    now,
-                    now
-                ))
+            conn.commit()
+            conn.close()
+            
+            self._invalidate_video(video_info['video_id'])
+            if spike:
+                self._notify_spikes([spike])
+            return True
+            
+        except Exception as e:
+            print(f"データベース保存エラー: {e}")
+            return False
+    
+    def save_videos(self, video_infos: List[Dict]) -> int:
+        """
+        複数の動画情報を1つのトランザクションで保存または更新
+        
+        Args:
+            video_infos: 動画情報の辞書のリスト
+        
+        Returns:
+            保存した件数。失敗した場合は0（トランザクション全体をロールバック）
+        """
+        if not video_infos:
+            return 0
+        
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            now = int(time.time())
+            
+            spikes = []
+            for video_info in video_infos:
+                spike = self._write_video(cursor, video_info, now)
+                if spike:
+                    spikes.append(spike)
+            
+            conn.commit()
+            self._notify_spikes(spikes)
+            return len(video_infos)
             
-            # 統計履歴を保存
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            print(f"データベース保存エラー: {e}")
+            return 0
+        finally:
+            if conn:
+                conn.close()
+            for video_info in video_infos:
+                self._invalidate_video(video_info.get('video_id'))
+    
+    def _write_video(self, cursor: sqlite3.Cursor, video_info: Dict, now: int) -> Optional[Dict]:
+        """
+        動画情報と統計履歴を書き込む（コミットは呼び出し側で行う）
+        
+        Args:
+            cursor: 書き込みに使用するカーソル
+            video_info: 動画情報の辞書
+            now: 記録日時（エポック秒）
+        
+        Returns:
+            急上昇を検知した場合は検知情報の辞書。それ以外はNone
+        """
+        # 既存の動画かチェック
+        cursor.execute('SELECT video_id FROM videos WHERE video_id = ?', 
+                     (video_info['video_id'],))
+        exists = cursor.fetchone()
+        
+        if exists:
+            # 更新
             cursor.execute('''
-                INSERT INTO video_statistics (
-                    video_id, view_count, like_count, comment_count, recorded_at
-                ) VALUES (?, ?, ?, ?, ?)
+                UPDATE videos SET
+                    title = ?,
+                    description = ?,
+                    channel_id = ?,
+                    channel_title = ?,
+                    published_at = ?,
+                    duration = ?,
+                    view_count = ?,
+                    like_count = ?,
+                    comment_count = ?,
+                    thumbnail_url = ?,
+                    tags = ?,
+                    category_id = ?,
+                    updated_at = ?
+                WHERE video_id = ?
+            ''', (
+                video_info.get('title', ''),
+                video_info.get('description', ''),
+                video_info.get('channel_id', ''),
+                video_info.get('channel_title', ''),
+                video_info.get('published_at', ''),
+                video_info.get('duration', 0),
+                video_info.get('view_count', 0),
+                video_info.get('like_count', 0),
+                video_info.get('comment_count', 0),
+                video_info.get('thumbnail_url', ''),
+                video_info.get('tags', ''),
+                video_info.get('category_id', ''),
+                now,
+                video_info['video_id']
+            ))
+        else:
+            # 新規作成
+            cursor.execute('''
+                INSERT INTO videos (
+                    video_id, title, description, channel_id, channel_title,
+                    published_at, duration, view_count, like_count,
+                    comment_count, thumbnail_url, tags, category_id,
+                    created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 video_info['video_id'],
+                video_info.get('title', ''),
+                video_info.get('description', ''),
+                video_info.get('channel_id', ''),
+                video_info.get('channel_title', ''),
+                video_info.get('published_at', ''),
+                video_info.get('duration', 0),
                 video_info.get('view_count', 0),
                 video_info.get('like_count', 0),
                 video_info.get('comment_count', 0),
+                video_info.get('thumbnail_url', ''),
+                video_info.get('tags', ''),
+                video_info.get('category_id', ''),
+                now,
                 now
             ))
-            
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            print(f"データベース保存エラー: {e}")
-            return False
+        
+        # 統計履歴を保存（同じ秒に記録済みの場合は上書き）
+        # 連番は同じ書き込みトランザクションの中でカウンタから採番する
+        cursor.execute('UPDATE statistics_seq SET value = value + 1 WHERE id = 1')
+        cursor.execute('''
+            INSERT OR REPLACE INTO video_statistics (
+                video_id, view_count, like_count, comment_count, recorded_at, seq
+            ) VALUES (?, ?, ?, ?, ?, (SELECT value FROM statistics_seq WHERE id = 1))
+        ''', (
+            video_info['video_id'],
+            video_info.get('view_count', 0),
+            video_info.get('like_count', 0),
+            video_info.get('comment_count', 0),
+            now
+        ))
+        
+        return self._update_trend(cursor, video_info['video_id'],
+                                  video_info.get('view_count', 0), now)
+    
+    def _update_trend(self, cursor: sqlite3.Cursor, video_id: str,
+                      view_count: int, now: int) -> Optional[Dict]:
+        """
+        新しいスナップショットで視聴速度の傾向を更新し、急上昇を判定
+        
+        視聴速度（1時間あたりの視聴回数増加）の指数移動平均と分散を
+        video_trendsに保持し、履歴を再走査せずに1件ごとにO(1)で更新する。
+        
+        Args:
+            cursor: 書き込みに使用するカーソル
+            video_id: 動画ID
+            view_count: 最新の視聴回数
+            now: 記録日時（エポック秒）
+        
+        Returns:
+            急上昇を検知した場合は検知情報の辞書。それ以外はNone
+        """
+        cursor.execute('''
+            SELECT last_view_count, last_recorded_at, velocity_mean, velocity_var, sample_count
+            FROM video_trends WHERE video_id = ?
+        ''', (video_id,))
+        state = cursor.fetchone()
+        
+        if not state:
+            cursor.execute('''
+                INSERT INTO video_trends (
+                    video_id, last_view_count, last_recorded_at,
+                    velocity, velocity_mean, velocity_var, sample_count
+                ) VALUES (?, ?, ?, NULL, NULL, 0, 0)
+            ''', (video_id, view_count, now))
+            return None
+        
+        last_view_count, last_recorded_at, mean, var, samples = state
+        hours = (now - last_recorded_at) / 3600
+        if hours < config.SPIKE_MIN_INTERVAL_HOURS:
+            # 間隔が短すぎると速度が不安定になるため、傾向は更新しない
+            return None
+        
+        velocity = (view_count - last_view_count) / hours
+        
+        spike = None
+        if samples >= config.SPIKE_MIN_SAMPLES and velocity >= config.SPIKE_MIN_VELOCITY:
+            # 更新前の平均・分散と比較して判定
+            # 速度が安定して分散がほぼ0の場合でも、平均に対する一定割合の揺れは許容する
+            stddev = max(math.sqrt(var), abs(mean) * config.SPIKE_MIN_STDDEV_RATIO, 1.0)
+            z_score = (velocity - mean) / stddev
+            if z_score >= config.SPIKE_Z_THRESHOLD:
+                spike = {
+                    'video_id': video_id,
+                    'view_count': view_count,
+                    'velocity': velocity,
+                    'expected_velocity': mean,
+                    'z_score': z_score,
+                    'detected_at': epoch_to_iso(now),
+                }
+                cursor.execute('''
+                    INSERT INTO video_spikes (
+                        video_id, view_count, velocity, expected_velocity, z_score, detected_at
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                ''', (video_id, view_count, velocity, mean, z_score, now))
+        
+        # 指数移動平均・分散を更新
+        if mean is None:
+            mean, var = velocity, 0.0
+        else:
+            alpha = config.SPIKE_EWMA_ALPHA
+            diff = velocity - mean
+            increment = alpha * diff
+            mean += increment
+            var = (1 - alpha) * (var + diff * increment)
+        
+        cursor.execute('''
+            UPDATE video_trends SET
+                last_view_count = ?,
+                last_recorded_at = ?,
+                velocity = ?,
+                velocity_mean = ?,
+                velocity_var = ?,
+                sample_count = ?
+            WHERE video_id = ?
+        ''', (view_count, now, velocity, mean, var, samples + 1, video_id))
+        
+        return spike
+    
+    def _notify_spikes(self, spikes: List[Dict]):
+        """
+        検知した急上昇をコールバックに通知
+        
+        Args:
+            spikes: 検知情報の辞書のリスト
+        """
+        if not self.on_spike:
+            return
+        
+        for spike in spikes:
+            try:
+                self.on_spike(spike)
+            except Exception as e:
+                print(f"急上昇通知エラー: {e}")
     
     def get_video(self, video_id: str) -> Optional[Dict]:
         """
@@ -201,8 +789,12 @@ class DataManager:
         Returns:
             動画情報の辞書。見つからない場合はNone
         """
+        cached = self._cache_get(('video', video_id))
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM videos WHERE video_id = ?', (video_id,))
@@ -213,8 +805,9 @@ class DataManager:
             if not row:
                 return None
             
-            columns = [description[0] for description in cursor.description]
-            return dict(zip(columns, row))
+            video = self._rows_to_dicts(cursor, [row])[0]
+            self._cache.put(('video', video_id), video)
+            return dict(video)
             
         except Exception as e:
             print(f"データベース取得エラー: {e}")
@@ -231,7 +824,7 @@ class DataManager:
             動画情報のリスト
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(f'SELECT * FROM videos ORDER BY {order_by}')
@@ -242,8 +835,7 @@ class DataManager:
             if not rows:
                 return []
             
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+            return self._rows_to_dicts(cursor, rows)
             
         except Exception as e:
             print(f"データベース取得エラー: {e}")
@@ -260,12 +852,17 @@ class DataManager:
         Returns:
             統計履歴のリスト
         """
+        # キャッシュは動画ごとに最後に取得した件数の結果だけを保持
+        cached = self._cache_get(('history', video_id))
+        if cached is not None and cached[0] == limit:
+            return [dict(stat) for stat in cached[1]]
+        
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT * FROM video_statistics
+            cursor.execute(f'''
+                SELECT {", ".join(StatSnapshot.COLUMNS)} FROM video_statistics
                 WHERE video_id = ?
                 ORDER BY recorded_at DESC
                 LIMIT ?
@@ -274,31 +871,412 @@ class DataManager:
             rows = cursor.fetchall()
             conn.close()
             
-            if not rows:
-                return []
-            
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+            history = self._rows_to_dicts(cursor, rows)
+            self._cache.put(('history', video_id), (limit, history))
+            return [dict(stat) for stat in history]
             
         except Exception as e:
             print(f"統計履歴取得エラー: {e}")
             return []
     
-    def save_channel(self, channel_info: Dict) -> bool:
+    def get_video_record(self, video_id: str) -> Optional[Video]:
         """
-        チャンネル情報を保存または更新
+        動画情報をレコードとして取得
         
-        Args:
-            channel_info: チャンネル情報の辞書
+        get_videoの辞書の代わりに__slots__ベースのVideoを返す。
+        
+        Args:
+            video_id: 動画ID
+        
+        Returns:
+            Video。見つからない場合はNone
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'SELECT {", ".join(Video.COLUMNS)} FROM videos WHERE video_id = ?',
+                         (video_id,))
+            row = cursor.fetchone()
+            
+            conn.close()
+            
+            return Video(*row) if row else None
+            
+        except Exception as e:
+            print(f"データベース取得エラー: {e}")
+            return None
+    
+    def iter_video_records(self, order_by: str = 'updated_at DESC', limit: int = None,
+                           offset: int = 0) -> Iterator[Video]:
+        """
+        すべての動画情報をレコードとして順に取得
+        
+        全件をリストに読み込まず、カーソルから1行ずつVideoを生成する。
+        
+        Args:
+            order_by: ソート順（デフォルト: updated_at DESC）
+            limit: 取得件数（省略時は全件）
+            offset: 先頭から読み飛ばす件数
+        
+        Yields:
+            Video
+        """
+        query = f'SELECT {", ".join(Video.COLUMNS)} FROM videos ORDER BY {order_by}'
+        params = []
+        if limit is not None or offset:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([-1 if limit is None else limit, offset])
+        
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(query, params)
+            for row in cursor:
+                yield Video(*row)
+            
+        except Exception as e:
+            print(f"データベース取得エラー: {e}")
+        finally:
+            if conn:
+                conn.close()
+    
+    def iter_statistics_records(self, video_id: str = None, limit: int = None) -> Iterator[StatSnapshot]:
+        """
+        統計履歴をレコードとして古い順に取得
+        
+        get_video_statistics_historyと異なり全件をリストに読み込まず、
+        カーソルから1行ずつStatSnapshotを生成する。
+        
+        Args:
+            video_id: 動画ID（省略時は全動画の履歴を動画ID順に返す）
+            limit: 取得件数（省略時は全件）
+        
+        Yields:
+            StatSnapshot
+        """
+        query = f'SELECT {", ".join(StatSnapshot.COLUMNS)} FROM video_statistics'
+        params = []
+        if video_id:
+            query += ' WHERE video_id = ? ORDER BY recorded_at'
+            params.append(video_id)
+        else:
+            query += ' ORDER BY video_id, recorded_at'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(query, params)
+            for row in cursor:
+                yield StatSnapshot(*row)
+            
+        except Exception as e:
+            print(f"統計履歴取得エラー: {e}")
+        finally:
+            if conn:
+                conn.close()
+    
+    def iter_statistics_rows(self, after_seq: int = None) -> Iterator[Tuple]:
+        """
+        統計履歴を動画ID・記録日時の順にタプルのまま取得（スナップショットの作成用）
+        
+        seqは書き込みトランザクションの中でカウンタから採番するため、コミット順に増え、
+        行を削除しても同じ番号が再利用されることはない。
+        1回の読み取りで見えている最大のseqより前の行は、以降にコミットされることはない。
+        
+        Args:
+            after_seq: この連番より後に書き込まれた行だけを取得（省略時は全件）
+        
+        Yields:
+            (video_id, recorded_at, view_count, like_count, comment_count, seq)
+            seqは連番を追加する前に記録された行ではNone
+        """
+        source = 'video_statistics'
+        params = []
+        if after_seq is not None:
+            # 並べ替えを避けて主キー順の全件走査が選ばれないよう、
+            # idx_video_statistics_seqで範囲を読み、差分だけを並べ替える
+            source = 'video_statistics INDEXED BY idx_video_statistics_seq WHERE seq > ?'
+            params.append(after_seq)
+        
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT video_id, recorded_at, view_count, like_count, comment_count, seq
+                FROM {source}
+                ORDER BY video_id, recorded_at
+            ''', params)
+            yield from cursor
+            
+        except Exception as e:
+            print(f"統計履歴取得エラー: {e}")
+            raise
+        finally:
+            if conn:
+                conn.close()
+    
+    def get_statistics_buckets(self, video_ids: List[str], bucket: str = None,
+                               since: Union[str, datetime] = None,
+                               until: Union[str, datetime] = None) -> List[Dict]:
+        """
+        統計履歴を期間・集計単位で絞り込み、前回との差分付きで取得
+        
+        集計と差分の計算はSQLite側（ウィンドウ関数）で行う。
+        bucketを指定した場合は各区間の最後のスナップショットを区間の値とする。
+        
+        Args:
+            video_ids: 動画IDのリスト（1回のクエリでまとめて取得）
+            bucket: 集計単位（'hour' / 'day' / 'week'。省略時は集計しない）
+            since: 期間の開始日時（この日時を含む）
+            until: 期間の終了日時（日付のみの場合はその日の終わりまで含む）
+        
+        Returns:
+            統計履歴のリスト（動画ID・日時の古い順）。各要素は以下を含む辞書:
+            video_id, bucket, recorded_at, view_count, like_count, comment_count,
+            view_delta, like_delta, comment_delta（各動画の最初の行の差分はNone）
+        """
+        if bucket is not None and bucket not in STATISTICS_BUCKETS:
+            raise ValueError(f"集計単位が不正です: {bucket}（{', '.join(STATISTICS_BUCKETS)}のいずれか）")
+        
+        bucket_expr = STATISTICS_BUCKETS[bucket] if bucket else 'recorded_at'
+        range_clause, range_params = self._recorded_at_range(since, until)
+        
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                WITH ranked AS (
+                    SELECT
+                        video_id,
+                        {bucket_expr} AS bucket,
+                        recorded_at,
+                        view_count,
+                        like_count,
+                        comment_count,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY video_id, {bucket_expr}
+                            ORDER BY recorded_at DESC
+                        ) AS rn
+                    FROM video_statistics
+                    WHERE video_id IN (SELECT value FROM json_each(?))
+                    {range_clause}
+                )
+                SELECT
+                    video_id,
+                    bucket,
+                    recorded_at,
+                    view_count,
+                    like_count,
+                    comment_count,
+                    view_count - LAG(view_count) OVER w AS view_delta,
+                    like_count - LAG(like_count) OVER w AS like_delta,
+                    comment_count - LAG(comment_count) OVER w AS comment_delta
+                FROM ranked
+                WHERE rn = 1
+                WINDOW w AS (PARTITION BY video_id ORDER BY bucket)
+                ORDER BY video_id, bucket
+            ''', [json.dumps(list(video_ids))] + range_params)
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            if not rows:
+                return []
+            
+            history = self._rows_to_dicts(cursor, rows)
+            if not bucket:
+                # 集計しない場合のバケットは記録日時そのもの
+                for stat in history:
+                    stat['bucket'] = stat['recorded_at']
+            return history
+            
+        except Exception as e:
+            print(f"統計履歴取得エラー: {e}")
+            return []
+    
+    def get_statistics_growth(self, video_ids: List[str] = None,
+                              since: Union[str, datetime] = None,
+                              until: Union[str, datetime] = None) -> Dict[str, Dict]:
+        """
+        期間内の成長（最初と最後のスナップショットの差）を動画ごとに取得
+        
+        Args:
+            video_ids: 動画IDのリスト（省略時はすべての動画）
+            since: 期間の開始日時（この日時を含む）
+            until: 期間の終了日時（日付のみの場合はその日の終わりまで含む）
+        
+        Returns:
+            動画ID→成長情報の辞書。成長情報は以下を含む辞書:
+            snapshot_count, first_recorded_at, last_recorded_at,
+            view_growth, like_growth, comment_growth
+        """
+        range_clause, range_params = self._recorded_at_range(since, until)
+        
+        params = []
+        id_clause = ''
+        if video_ids is not None:
+            id_clause = 'AND video_id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(list(video_ids)))
+        params += range_params
+        
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT DISTINCT
+                    video_id,
+                    COUNT(*) OVER w AS snapshot_count,
+                    FIRST_VALUE(recorded_at) OVER w AS first_recorded_at,
+                    LAST_VALUE(recorded_at) OVER w AS last_recorded_at,
+                    LAST_VALUE(view_count) OVER w - FIRST_VALUE(view_count) OVER w AS view_growth,
+                    LAST_VALUE(like_count) OVER w - FIRST_VALUE(like_count) OVER w AS like_growth,
+                    LAST_VALUE(comment_count) OVER w - FIRST_VALUE(comment_count) OVER w AS comment_growth
+                FROM video_statistics
+                WHERE 1 = 1
+                {id_clause}
+                {range_clause}
+                WINDOW w AS (
+                    PARTITION BY video_id ORDER BY recorded_at
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                )
+            ''', params)
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return {growth.pop('video_id'): growth for growth in self._rows_to_dicts(cursor, rows)}
+            
+        except Exception as e:
+            print(f"統計履歴取得エラー: {e}")
+            return {}
+    
+    @staticmethod
+    def _rows_to_dicts(cursor: sqlite3.Cursor, rows: List[tuple]) -> List[Dict]:
+        """
+        行を辞書に変換（エポック秒で保存している日時はISO 8601形式の文字列に戻す）
+        
+        Args:
+            cursor: クエリを実行したカーソル
+            rows: 取得した行のリスト
+        
+        Returns:
+            辞書のリスト
+        """
+        columns = [description[0] for description in cursor.description]
+        timestamps = [i for i, column in enumerate(columns) if column in TIMESTAMP_FIELDS]
+        
+        results = []
+        for row in rows:
+            if timestamps:
+                row = list(row)
+                for i in timestamps:
+                    row[i] = epoch_to_iso(row[i])
+            results.append(dict(zip(columns, row)))
+        return results
+    
+    @staticmethod
+    def _recorded_at_range(since: Union[str, datetime] = None,
+                           until: Union[str, datetime] = None,
+                           column: str = 'recorded_at') -> Tuple[str, List]:
+        """
+        記録日時の期間条件を作成
+        
+        Args:
+            since: 期間の開始日時（この日時を含む）
+            until: 期間の終了日時（日付のみの文字列の場合はその日の終わりまで含む）
+            column: 条件に使用する列名
+        
+        Returns:
+            (AND から始まるWHERE句の断片, パラメータのリスト)
+        """
+        clause = ''
+        params = []
+        
+        if since is not None:
+            if isinstance(since, str):
+                since = datetime.fromisoformat(since)
+            clause += f' AND {column} >= ?'
+            params.append(to_epoch(since))
+        
+        if until is not None:
+            operator = '<='
+            if isinstance(until, str):
+                try:
+                    # 日付のみ（2024-01-01, 20240101など）の場合は翌日0時未満とする
+                    until = datetime.combine(date.fromisoformat(until), datetime.min.time())
+                    until += timedelta(days=1)
+                    operator = '<'
+                except ValueError:
+                    until = datetime.fromisoformat(until)
+            clause += f' AND {column} {operator} ?'
+            params.append(to_epoch(until))
+        
+        return clause, params
+    
+    def get_spikes(self, since: Union[str, datetime] = None, limit: int = 50) -> List[Dict]:
+        """
+        検知した急上昇の履歴を取得
+        
+        Args:
+            since: この日時以降に検知したものに絞り込む
+            limit: 取得件数
+        
+        Returns:
+            検知情報のリスト（新しい順）。動画タイトルを含む
+        """
+        range_clause, params = self._recorded_at_range(since, None, column='s.detected_at')
+        
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT s.video_id, v.title, s.view_count, s.velocity,
+                       s.expected_velocity, s.z_score, s.detected_at
+                FROM video_spikes s
+                LEFT JOIN videos v ON v.video_id = s.video_id
+                WHERE 1 = 1
+                {range_clause}
+                ORDER BY s.detected_at DESC
+                LIMIT ?
+            ''', params + [limit])
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return self._rows_to_dicts(cursor, rows)
+            
+        except Exception as e:
+            print(f"急上昇履歴取得エラー: {e}")
+            return []
+    
+    def save_channel(self, channel_info: Dict) -> bool:
+        """
+        チャンネル情報を保存または更新
+        
+        Args:
+            channel_info: チャンネル情報の辞書
         
         Returns:
             成功した場合True
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
-            now = datetime.now().isoformat()
+            now = int(time.time())
             
             cursor.execute('SELECT channel_id FROM channels WHERE channel_id = ?',
                          (channel_info['channel_id'],))
@@ -339,12 +1317,337 @@ class DataManager:
             
             conn.commit()
             conn.close()
+            
+            self._cache.pop(('channel', channel_info['channel_id']))
             return True
             
         except Exception as e:
             print(f"チャンネル情報保存エラー: {e}")
             return False
     
+    def get_channel(self, channel_id: str) -> Optional[Dict]:
+        """
+        チャンネル情報を取得
+        
+        Args:
+            channel_id: チャンネルID
+        
+        Returns:
+            チャンネル情報の辞書。見つからない場合はNone
+        """
+        cached = self._cache_get(('channel', channel_id))
+        if cached is not None:
+            return dict(cached)
+        
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM channels WHERE channel_id = ?', (channel_id,))
+            row = cursor.fetchone()
+            
+            conn.close()
+            
+            if not row:
+                return None
+            
+            channel = self._rows_to_dicts(cursor, [row])[0]
+            self._cache.put(('channel', channel_id), channel)
+            return dict(channel)
+            
+        except Exception as e:
+            print(f"データベース取得エラー: {e}")
+            return None
+    
+    def get_comment_sync_targets(self, video_ids: List[str] = None) -> Dict[str, Dict]:
+        """
+        コメントの同期が必要な動画を取得
+        
+        未同期の動画、前回の同期からコメント数が変わった動画、
+        前回ページ数の上限で止まった動画だけを返す。
+        
+        Args:
+            video_ids: 対象を絞り込む動画IDのリスト（省略時はすべての動画）
+        
+        Returns:
+            動画ID→同期情報の辞書。同期情報は以下を含む辞書:
+            since（この日時までのコメントは取得済み。エポック秒、未同期はNone）,
+            page_token（前回の続きのページトークン。続きがない場合はNone）,
+            comment_count（動画の現在のコメント数）
+        """
+        params = []
+        id_clause = ''
+        if video_ids is not None:
+            id_clause = 'AND v.video_id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(list(video_ids)))
+        
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT v.video_id, s.last_published_at, s.page_token, v.comment_count
+                FROM videos v
+                LEFT JOIN comment_sync s ON s.video_id = v.video_id
+                WHERE (s.video_id IS NULL
+                       OR s.synced_comment_count IS NOT v.comment_count
+                       OR s.page_token IS NOT NULL)
+                {id_clause}
+            ''', params)
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return {
+                video_id: {'since': since, 'page_token': page_token, 'comment_count': comment_count}
+                for video_id, since, page_token, comment_count in rows
+            }
+            
+        except Exception as e:
+            print(f"コメント同期情報取得エラー: {e}")
+            return {}
+    
+    def save_comments(self, results_by_video: Dict[str, Dict],
+                      comment_counts: Dict[str, int]) -> int:
+        """
+        取得したコメントを保存し、動画ごとの同期位置を進める（1トランザクション）
+        
+        前回の位置まで取得し終えた動画だけ同期位置（last_published_at）を進める。
+        ページ数の上限で止まった動画は続きのページトークンを記録し、同期位置は据え置く
+        （次回は続きのページから前回の位置までを取得する）。
+        
+        続きのページから再開した動画は最新のページを取得していないため、同期時点の件数を記録しない。
+        最新のページから取得したときの件数を据え置くことで、その後にコメント数が変わっていれば
+        次回の同期で最新のページから取得し直す。
+        
+        Args:
+            results_by_video: 動画ID→取得結果（comments, next_page_tokenを含む辞書）の辞書
+                              （YouTubeAPI.batch_get_new_commentsの戻り値）
+            comment_counts: 動画ID→同期時点の動画のコメント数の辞書
+                            （最新のページから取得した動画だけを含める）
+        
+        Returns:
+            保存したコメントの件数。失敗した場合は0
+        """
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            now = int(time.time())
+            saved = 0
+            
+            for video_id, result in results_by_video.items():
+                comments = result['comments']
+                rows = [(
+                    comment['comment_id'],
+                    video_id,
+                    comment.get('author', ''),
+                    comment.get('text', ''),
+                    comment.get('like_count', 0),
+                    comment.get('reply_count', 0),
+                    to_epoch(comment.get('published_at')),
+                    to_epoch(comment.get('updated_at')),
+                ) for comment in comments]
+                
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO comments (
+                        comment_id, video_id, author, text, like_count,
+                        reply_count, published_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                saved += len(rows)
+                
+                latest = max((row[6] for row in rows if row[6] is not None), default=None)
+                count_synced = video_id in comment_counts
+                
+                if result.get('next_page_token'):
+                    # 途中までしか取得できていないので、最新の投稿日時は続きを取得し終えるまで保留
+                    cursor.execute('''
+                        INSERT INTO comment_sync (
+                            video_id, last_published_at, synced_comment_count, synced_at,
+                            page_token, pending_published_at
+                        ) VALUES (?, NULL, ?, ?, ?, ?)
+                        ON CONFLICT(video_id) DO UPDATE SET
+                            synced_comment_count = CASE WHEN ? THEN excluded.synced_comment_count
+                                                        ELSE synced_comment_count END,
+                            synced_at = excluded.synced_at,
+                            page_token = excluded.page_token,
+                            pending_published_at = NULLIF(MAX(IFNULL(pending_published_at, -1),
+                                                              IFNULL(excluded.pending_published_at, -1)), -1)
+                    ''', (video_id, comment_counts.get(video_id), now, result['next_page_token'], latest,
+                          count_synced))
+                else:
+                    # 前回の位置まで取得し終えたので、保留していた分も含めて同期位置を進める
+                    cursor.execute('''
+                        INSERT INTO comment_sync (
+                            video_id, last_published_at, synced_comment_count, synced_at,
+                            page_token, pending_published_at
+                        ) VALUES (?, ?, ?, ?, NULL, NULL)
+                        ON CONFLICT(video_id) DO UPDATE SET
+                            last_published_at = NULLIF(MAX(IFNULL(last_published_at, -1),
+                                                           IFNULL(excluded.last_published_at, -1),
+                                                           IFNULL(pending_published_at, -1)), -1),
+                            synced_comment_count = CASE WHEN ? THEN excluded.synced_comment_count
+                                                        ELSE synced_comment_count END,
+                            synced_at = excluded.synced_at,
+                            page_token = NULL,
+                            pending_published_at = NULL
+                    ''', (video_id, latest, comment_counts.get(video_id), now, count_synced))
+            
+            conn.commit()
+            return saved
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            print(f"コメント保存エラー: {e}")
+            return 0
+        finally:
+            if conn:
+                conn.close()
+    
+    def reset_comment_sync_pages(self, video_ids: List[str]) -> bool:
+        """
+        記録した続きのページトークンを破棄（トークンが使えなくなった場合用）
+        
+        同期位置と保留中の最新の投稿日時は残すため、次回は最新のページから
+        同期位置までを取得し直す。
+        
+        Args:
+            video_ids: 動画IDのリスト
+        
+        Returns:
+            成功した場合True
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'UPDATE comment_sync SET page_token = NULL WHERE video_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(video_ids)),)
+            )
+            
+            conn.commit()
+            conn.close()
+            return True
+            
+        except Exception as e:
+            print(f"コメント同期情報の更新エラー: {e}")
+            return False
+    
+    def get_comments(self, video_id: str, limit: int = 20) -> List[Dict]:
+        """
+        保存済みのコメントを新しい順に取得
+        
+        Args:
+            video_id: 動画ID
+            limit: 取得件数
+        
+        Returns:
+            コメント情報のリスト（published_atはISO 8601形式の文字列）
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT * FROM comments
+                WHERE video_id = ?
+                ORDER BY published_at DESC
+                LIMIT ?
+            ''', (video_id, limit))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            comments = self._rows_to_dicts(cursor, rows)
+            for comment in comments:
+                comment['published_at'] = epoch_to_iso(comment['published_at'])
+            return comments
+            
+        except Exception as e:
+            print(f"コメント取得エラー: {e}")
+            return []
+    
+    def record_fetch_failures(self, failures: Dict[str, str]) -> bool:
+        """
+        取得できなかった動画を記録（記録済みの動画はエラー内容と日時を更新）
+        
+        Args:
+            failures: 動画ID→エラー内容の辞書
+        
+        Returns:
+            成功した場合True
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            now = int(time.time())
+            cursor.executemany('''
+                INSERT OR REPLACE INTO fetch_failures (video_id, error, failed_at)
+                VALUES (?, ?, ?)
+            ''', [(video_id, error, now) for video_id, error in failures.items()])
+            
+            conn.commit()
+            conn.close()
+            return True
+            
+        except Exception as e:
+            print(f"取得失敗の記録エラー: {e}")
+            return False
+    
+    def clear_fetch_failures(self, video_ids: List[str]) -> bool:
+        """
+        取得できた動画を取得失敗の記録から削除
+        
+        Args:
+            video_ids: 動画IDのリスト
+        
+        Returns:
+            成功した場合True
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'DELETE FROM fetch_failures WHERE video_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(video_ids)),)
+            )
+            
+            conn.commit()
+            conn.close()
+            return True
+            
+        except Exception as e:
+            print(f"取得失敗の記録エラー: {e}")
+            return False
+    
+    def get_fetch_failures(self) -> List[str]:
+        """
+        前回までに取得できなかった動画IDを取得
+        
+        Returns:
+            動画IDのリスト（失敗した日時の古い順）
+        """
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT video_id FROM fetch_failures ORDER BY failed_at, video_id')
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            print(f"取得失敗の記録取得エラー: {e}")
+            return []
+    
     def delete_video(self, video_id: str) -> bool:
         """
         動画情報を削除
@@ -356,15 +1659,22 @@ class DataManager:
             成功した場合True
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 統計履歴も削除
             cursor.execute('DELETE FROM video_statistics WHERE video_id = ?', (video_id,))
+            cursor.execute('DELETE FROM video_trends WHERE video_id = ?', (video_id,))
+            cursor.execute('DELETE FROM video_spikes WHERE video_id = ?', (video_id,))
+            cursor.execute('DELETE FROM comments WHERE video_id = ?', (video_id,))
+            cursor.execute('DELETE FROM comment_sync WHERE video_id = ?', (video_id,))
+            cursor.execute('DELETE FROM fetch_failures WHERE video_id = ?', (video_id,))
             cursor.execute('DELETE FROM videos WHERE video_id = ?', (video_id,))
             
             conn.commit()
             conn.close()
+            
+            self._invalidate_video(video_id)
             return True
             
         except Exception as e:
@@ -379,7 +1689,7 @@ class DataManager:
             統計情報の辞書
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 総動画数
@@ -3,10 +3,13 @@ YouTube Shorts動画情報管理システム
 メインアプリケーション
 """
 import argparse
+import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
+import config
 from youtube_api import YouTubeAPI
 from data_manager import DataManager
+from writer import VideoWriter
 
 
 class YouTubeShortsManager:
@@ -16,7 +19,7 @@ class YouTubeShortsManager:
         """初期化"""
         try:
             self.api = YouTubeAPI()
-            self.db = DataManager()
+            self.db = DataManager(on_spike=self._report_spike)
         except ValueError as e:
             print(f"初期化エラー: {e}")
             print("\n使用方法:")
@@ -64,6 +67,16 @@ class YouTubeShortsManager:
         print(f"\n動画情報を更新中: {video_id}")
         
         video_info = self.api.get_video_info(video_id)
+        self._save_video_update(video_id, video_info)
+    
+    def _save_video_update(self, video_id: str, video_info: dict):
+        """
+        取得済みの動画情報で保存済みの動画を更新
+        
+        Args:
+            video_id: 動画ID
+            video_info: APIから取得した動画情報（取得失敗時はNone）
+        """
         if not video_info:
             print("エラー: 動画情報の取得に失敗しました。")
             return
@@ -79,19 +92,83 @@ class YouTubeShortsManager:
         else:
             print("エラー: データベースの更新に失敗しました。")
     
-    def update_all_videos(self):
-        """すべての動画情報を更新"""
+    def update_all_videos(self, resume: bool = False):
+        """
+        すべての動画情報とチャンネル情報を更新
+        
+        取得できなかった動画は記録しておき、resumeを指定した次回の実行でそれだけを再取得する。
+        
+        Args:
+            resume: 前回取得できなかった動画だけを更新する場合True
+        """
         videos = self.db.get_all_videos()
         
+        if resume:
+            failed_ids = set(self.db.get_fetch_failures())
+            videos = [video for video in videos if video['video_id'] in failed_ids]
+        
         if not videos:
-            print("更新する動画がありません。")
+            print("再取得が必要な動画はありません。" if resume else "更新する動画がありません。")
             return
         
         print(f"\n{len(videos)}件の動画を更新中...")
         
+        video_ids = [video['video_id'] for video in videos]
+        channel_ids = sorted({video['channel_id'] for video in videos if video.get('channel_id')})
+        
+        # 書き込みに成功した動画（書き込みスレッドから追加される）
+        saved = set()
+        
+        def on_flush(video_infos):
+            saved.update(video_info['video_id'] for video_info in video_infos)
+        
+        # 動画とチャンネルの情報をバッチリクエストでまとめて取得し、
+        # 取得できたバッチから順に書き込みスレッドへ渡す（通信中に前のバッチを保存する）
+        with VideoWriter(self.db, on_flush=on_flush) as writer:
+            video_infos, channel_infos = self.api.batch_get_info(video_ids, channel_ids, on_video=writer.put)
+        
+        # 結果は保存が終わってから表示する
         for i, video in enumerate(videos, 1):
             print(f"\n[{i}/{len(videos)}] {video['title']}")
-            self.update_video(video['video_id'])
+            
+            video_info = video_infos.get(video['video_id'])
+            if not video_info:
+                print("エラー: 動画情報の取得に失敗しました。")
+                continue
+            if video['video_id'] not in saved:
+                print("エラー: 動画情報をデータベースに保存できませんでした。")
+                continue
+            
+            view_growth = video_info['view_count'] - (video.get('view_count') or 0)
+            print(f"\n✓ 動画情報を更新しました: {video_info['title']}")
+            print(f"  視聴回数: {video_info['view_count']:,} ({view_growth:+,})")
+        
+        if writer.failed:
+            print(f"\nエラー: {writer.failed}件の動画をデータベースに保存できませんでした。")
+        
+        for channel_info in channel_infos.values():
+            self.db.save_channel(channel_info)
+        
+        # 取得・保存できなかった動画を記録し、保存できた動画は記録から外す
+        fetch_error = self.api.policy.open_reason or '動画情報を取得できませんでした'
+        missing = {
+            video_id: fetch_error if video_id not in video_infos else 'データベースに保存できませんでした'
+            for video_id in video_ids if video_id not in saved
+        }
+        self.db.clear_fetch_failures(list(saved))
+        if missing:
+            self.db.record_fetch_failures(missing)
+        
+        print(f"\n{writer.written}/{len(videos)}件の動画、{len(channel_infos)}件のチャンネルを更新しました。")
+        
+        if self.api.circuit_open:
+            print("クォータ超過または認証エラーのため途中で停止しました。")
+        if missing:
+            print(f"{len(missing)}件の動画を更新できませんでした。"
+                  "'update-all --resume' で更新できなかった動画だけを再取得できます。")
+        
+        if config.SNAPSHOT_AFTER_UPDATE:
+            self.update_snapshot()
     
     def list_videos(self, limit: int = 10):
         """
@@ -121,14 +198,20 @@ class YouTubeShortsManager:
         if len(videos) > limit:
             print(f"\n... 他 {len(videos) - limit}件")
     
-    def show_statistics(self, video_id: str = None):
+    def show_statistics(self, video_id: str = None, since: str = None,
+                        until: str = None, bucket: str = None):
         """
         統計情報を表示
         
         Args:
             video_id: 動画ID（指定した場合はその動画の統計履歴を表示）
+            since: 統計履歴の期間の開始日時
+            until: 統計履歴の期間の終了日時
+            bucket: 統計履歴の集計単位（'hour' / 'day' / 'week'）
         """
-        if video_id:
+        if video_id and (since or until or bucket):
+            self._show_statistics_range(video_id, since, until, bucket)
+        elif video_id:
             # 特定の動画の統計履歴
             history = self.db.get_video_statistics_history(video_id)
             video = self.db.get_video(video_id)
@@ -175,6 +258,176 @@ class YouTubeShortsManager:
             print(f"総いいね数: {summary.get('total_likes', 0):,}件")
             print(f"平均視聴回数: {summary.get('average_views', 0):,.0f}回")
     
+    def _show_statistics_range(self, video_id: str, since: str = None,
+                               until: str = None, bucket: str = None):
+        """
+        期間・集計単位を指定して統計履歴を表示（集計はデータベース側で行う）
+        
+        Args:
+            video_id: 動画ID
+            since: 期間の開始日時
+            until: 期間の終了日時
+            bucket: 集計単位（'hour' / 'day' / 'week'）
+        """
+        video = self.db.get_video(video_id)
+        if not video:
+            print(f"動画ID {video_id} が見つかりません。")
+            return
+        
+        history = self.db.get_statistics_buckets([video_id], bucket, since, until)
+        growth = self.db.get_statistics_growth([video_id], since, until).get(video_id)
+        
+        bucket_labels = {'hour': '1時間', 'day': '1日', 'week': '1週間'}
+        print(f"\n動画統計履歴: {video['title']}")
+        print(f"期間: {since or '最初'} 〜 {until or '最新'}  集計単位: {bucket_labels.get(bucket, 'なし')}")
+        print("=" * 80)
+        
+        if not history:
+            print("統計履歴がありません。")
+            return
+        
+        date_formats = {'hour': '%Y-%m-%d %H:00', 'day': '%Y-%m-%d', 'week': '%Y-%m-%d'}
+        date_format = date_formats.get(bucket, '%Y-%m-%d %H:%M:%S')
+        
+        print(f"{'日時':<20} {'視聴回数':>12} {'(増加)':>10} {'いいね数':>10} {'コメント数':>10}")
+        print("-" * 80)
+        
+        for stat in history:
+            date = datetime.fromisoformat(stat['bucket']).strftime(date_format)
+            view_delta = f"{stat['view_delta']:+,}" if stat['view_delta'] is not None else '-'
+            print(f"{date:<20} {stat['view_count']:>12,} {view_delta:>10} "
+                  f"{stat['like_count']:>10,} {stat['comment_count']:>10,}")
+        
+        if growth and growth['snapshot_count'] >= 2:
+            print("\n成長:")
+            print(f"  視聴回数: {growth['view_growth']:+,}")
+            print(f"  いいね数: {growth['like_growth']:+,}")
+            print(f"  コメント数: {growth['comment_growth']:+,}")
+    
+    def _report_spike(self, spike: dict):
+        """
+        急上昇の検知を表示（DataManagerのコールバック）
+        
+        Args:
+            spike: 検知情報の辞書
+        """
+        print(f"\n⚡ 急上昇を検知しました: {spike['video_id']}")
+        print(f"  視聴速度: {spike['velocity']:,.0f}回/時間 (通常: {spike['expected_velocity']:,.0f}回/時間)")
+    
+    def show_spikes(self, hours: int = 24, limit: int = 20):
+        """
+        検知した急上昇の一覧を表示
+        
+        Args:
+            hours: 何時間前までの検知を表示するか
+            limit: 表示件数
+        """
+        since = datetime.now() - timedelta(hours=hours)
+        spikes = self.db.get_spikes(since, limit)
+        
+        if not spikes:
+            print(f"\n過去{hours}時間に急上昇した動画はありません。")
+            return
+        
+        print(f"\n急上昇した動画 (過去{hours}時間, {len(spikes)}件):")
+        print("=" * 80)
+        
+        for i, spike in enumerate(spikes, 1):
+            date = datetime.fromisoformat(spike['detected_at']).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"\n{i}. {spike['title'] or spike['video_id']}")
+            print(f"   動画ID: {spike['video_id']}")
+            print(f"   検知日時: {date}")
+            print(f"   視聴回数: {spike['view_count']:,}")
+            print(f"   視聴速度: {spike['velocity']:,.0f}回/時間 (通常: {spike['expected_velocity']:,.0f}回/時間, z={spike['z_score']:.1f})")
+    
+    def sync_comments(self, video_ids: list = None):
+        """
+        コメントを差分同期
+        
+        前回の同期からコメント数が変わった動画だけを対象に、
+        前回取得した位置より新しいコメントだけをまとめて取得する。
+        ページ数の上限で止まった動画は、次回の同期で続きのページから取得する。
+        
+        Args:
+            video_ids: 対象の動画IDのリスト（省略時はすべての動画）
+        """
+        targets = self.db.get_comment_sync_targets(video_ids or None)
+        
+        if not targets:
+            print("\nコメントが変わった動画はありません。")
+            return
+        
+        print(f"\n{len(targets)}件の動画のコメントを同期中...")
+        
+        since = {video_id: target['since'] for video_id, target in targets.items()}
+        page_tokens = {video_id: target['page_token'] for video_id, target in targets.items()
+                       if target['page_token']}
+        results = self.api.batch_get_new_comments(since, page_tokens)
+        
+        # 続きのページから再開した動画は、最新のページを取得したときの件数を据え置く
+        comment_counts = {video_id: target['comment_count'] for video_id, target in targets.items()
+                          if video_id not in page_tokens}
+        saved = self.db.save_comments(results, comment_counts)
+        
+        failed = [video_id for video_id in targets if video_id not in results]
+        incomplete = [video_id for video_id, result in results.items() if result['next_page_token']]
+        
+        # 再試行しても続きのページを取得できなかった動画は、次回は最新のページから取得し直す
+        stale_tokens = [video_id for video_id in failed if video_id in page_tokens]
+        if stale_tokens and not self.api.circuit_open:
+            self.db.reset_comment_sync_pages(stale_tokens)
+        
+        print(f"\n✓ {len(results)}件の動画から{saved:,}件のコメントを保存しました。")
+        if incomplete:
+            print(f"  ページ数の上限に達した動画: {len(incomplete)}件（次回の同期で続きを取得します）")
+        if failed:
+            print(f"  取得に失敗した動画: {len(failed)}件（次回の同期で再取得します）")
+        if self.api.circuit_open:
+            print("  クォータ超過または認証エラーのため途中で停止しました。")
+    
+    def show_comments(self, video_id: str, limit: int = 20):
+        """
+        保存済みのコメントを表示
+        
+        Args:
+            video_id: 動画ID
+            limit: 表示件数
+        """
+        video = self.db.get_video(video_id)
+        if not video:
+            print(f"動画ID {video_id} が見つかりません。")
+            return
+        
+        comments = self.db.get_comments(video_id, limit)
+        
+        print(f"\nコメント: {video['title']}")
+        print("=" * 80)
+        
+        if not comments:
+            print("コメントがありません。（sync-commentsで取得できます）")
+            return
+        
+        for comment in comments:
+            date = datetime.fromisoformat(comment['published_at']).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"\n{comment['author']} ({date})  いいね: {comment['like_count']:,}  返信: {comment['reply_count']:,}")
+            print(f"  {comment['text']}")
+    
+    def update_snapshot(self, rebuild: bool = False):
+        """
+        統計履歴のスナップショットを作成・追記
+        
+        Args:
+            rebuild: 既存のスナップショットを破棄して作り直す場合True
+        """
+        from snapshot import SnapshotWriter
+        
+        writer = SnapshotWriter(self.db)
+        added = writer.update(rebuild)
+        if added is None:
+            return
+        
+        print(f"\n✓ スナップショットに{added:,}件の統計履歴を追記しました: {writer.directory}")
+    
     def search_shorts(self, query: str, max_results: int = 10):
         """
         YouTube Shortsを検索して表示
@@ -203,6 +456,25 @@ class YouTubeShortsManager:
             print(f"   URL: https://youtube.com/watch?v={video['video_id']}")
 
 
+def iso_datetime(value: str) -> str:
+    """
+    コマンドライン引数の日時を検証（ISO 8601形式の日付または日時）
+    
+    Args:
+        value: 引数の文字列
+    
+    Returns:
+        引数の文字列（日付のみかどうかで期間の扱いが変わるため変換しない）
+    """
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"日時の形式が正しくありません: {value}（例: 2024-01-01 または 2024-01-01T12:00:00）"
+        )
+    return value
+
+
 def main():
     """メイン関数"""
     parser = argparse.ArgumentParser(
@@ -221,6 +493,7 @@ def main():
   
   # すべての動画を更新
   python main.py update-all
+  python main.py update-all --resume
   
   # 統計情報を表示
   python main.py stats
@@ -228,11 +501,37 @@ def main():
   # 特定の動画の統計履歴を表示
   python main.py stats VIDEO_ID
   
+  # 期間を指定して1日ごとに集計した統計履歴を表示
+  python main.py stats VIDEO_ID --since 2024-01-01 --until 2024-01-31 --bucket day
+  
+  # 急上昇した動画を表示
+  python main.py spikes
+  
+  # コメントを差分同期して表示
+  python main.py sync-comments
+  python main.py comments VIDEO_ID
+  
+  # 統計履歴のスナップショット（列ごとの.npyファイル）を作成・追記
+  python main.py snapshot
+  
+  # フロントエンド向けのJSON APIサーバーを起動
+  python main.py serve
+  
   # YouTube Shortsを検索
   python main.py search "検索キーワード"
+  
+  # コマンドの処理時間を計測（--profileはコマンド名の前に指定）
+  python main.py --profile update-all
+  python main.py --profile --profile-output /tmp/update update-all
         '''
     )
     
+    parser.add_argument('--profile', action='store_true',
+                        help='コマンドをプロファイリングして層ごとの集計を表示'
+                             f'（環境変数 {config.PROFILE_ENV_VAR} でも指定可能）')
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help='プロファイル結果の保存先（PATH.prof と PATH.collapsed。省略時はカレントディレクトリ）')
+    
     subparsers = parser.add_subparsers(dest='command', help='コマンド')
     
     # addコマンド
@@ -248,11 +547,40 @@ def main():
     update_parser.add_argument('video_id', help='動画ID')
     
     # update-allコマンド
-    subparsers.add_parser('update-all', help='すべての動画情報を更新')
+    update_all_parser = subparsers.add_parser('update-all', help='すべての動画情報を更新')
+    update_all_parser.add_argument('--resume', action='store_true',
+                                   help='前回取得できなかった動画だけを再取得')
     
     # statsコマンド
     stats_parser = subparsers.add_parser('stats', help='統計情報を表示')
     stats_parser.add_argument('video_id', nargs='?', help='動画ID（省略時は全体統計）')
+    stats_parser.add_argument('--since', type=iso_datetime, help='統計履歴の開始日時（例: 2024-01-01 または 2024-01-01T12:00:00）')
+    stats_parser.add_argument('--until', type=iso_datetime, help='統計履歴の終了日時（日付のみの場合はその日を含む）')
+    stats_parser.add_argument('--bucket', choices=['hour', 'day', 'week'], help='統計履歴の集計単位')
+    
+    # spikesコマンド
+    spikes_parser = subparsers.add_parser('spikes', help='急上昇した動画を表示')
+    spikes_parser.add_argument('-H', '--hours', type=int, default=24, help='何時間前までの検知を表示するか')
+    spikes_parser.add_argument('-n', '--limit', type=int, default=20, help='表示件数')
+    
+    # sync-commentsコマンド
+    sync_comments_parser = subparsers.add_parser('sync-comments', help='コメントを差分同期')
+    sync_comments_parser.add_argument('video_ids', nargs='*', help='動画ID（省略時はすべての動画）')
+    
+    # commentsコマンド
+    comments_parser = subparsers.add_parser('comments', help='保存済みのコメントを表示')
+    comments_parser.add_argument('video_id', help='動画ID')
+    comments_parser.add_argument('-n', '--limit', type=int, default=20, help='表示件数')
+    
+    # snapshotコマンド
+    snapshot_parser = subparsers.add_parser('snapshot', help='統計履歴のスナップショットを作成・追記')
+    snapshot_parser.add_argument('--rebuild', action='store_true',
+                                 help='既存のスナップショットを破棄して作り直す')
+    
+    # serveコマンド
+    serve_parser = subparsers.add_parser('serve', help='読み取り専用のJSON APIサーバーを起動')
+    serve_parser.add_argument('--host', help='待ち受けるホスト（既定: 127.0.0.1）')
+    serve_parser.add_argument('--port', type=int, help='待ち受けるポート（既定: 8765）')
     
     # searchコマンド
     search_parser = subparsers.add_parser('search', help='YouTube Shortsを検索')
@@ -265,6 +593,33 @@ def main():
         parser.print_help()
         return
     
+    # 環境変数は定期実行など引数を変えにくい場合に1回の実行だけを計測するためのもの
+    env_profile = os.environ.get(config.PROFILE_ENV_VAR, '')
+    if env_profile.lower() in ('', '0', 'false') and not args.profile:
+        run_command(args)
+        return
+    
+    output = args.profile_output
+    if output is None and env_profile.lower() not in ('', '0', 'false', '1', 'true'):
+        output = env_profile
+    
+    from profiler import run_profiled
+    run_profiled(lambda: run_command(args), output, args.command)
+
+
+def run_command(args: argparse.Namespace):
+    """
+    コマンドを実行
+    
+    Args:
+        args: コマンドライン引数
+    """
+    if args.command == 'serve':
+        # APIキーは不要なため、管理クラスを作らずに起動
+        from server import run_server
+        run_server(args.host, args.port)
+        return
+    
     manager = YouTubeShortsManager()
     
     if args.command == 'add':
@@ -274,9 +629,17 @@ def main():
     elif args.command == 'update':
         manager.update_video(args.video_id)
     elif args.command == 'update-all':
-        manager.update_all_videos()
+        manager.update_all_videos(args.resume)
     elif args.command == 'stats':
-        manager.show_statistics(args.video_id)
+        manager.show_statistics(args.video_id, args.since, args.until, args.bucket)
+    elif args.command == 'spikes':
+        manager.show_spikes(args.hours, args.limit)
+    elif args.command == 'sync-comments':
+        manager.sync_comments(args.video_ids)
+    elif args.command == 'comments':
+        manager.show_comments(args.video_id, args.limit)
+    elif args.command == 'snapshot':
+        manager.update_snapshot(args.rebuild)
     elif args.command == 'search':
         manager.search_shorts(args.query, args.max_results)
 
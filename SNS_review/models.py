@@ -0,0 +1,141 @@
+"""
+データモデルモジュール
+データベースの行を表す軽量なレコードクラス
+"""
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+
+# データベースに整数のエポック秒で保存している日時の項目
+TIMESTAMP_FIELDS = frozenset((
+    'created_at', 'updated_at', 'recorded_at', 'detected_at',
+    'first_recorded_at', 'last_recorded_at',
+))
+
+
+def to_epoch(value: Union[str, datetime, int, None]) -> Optional[int]:
+    """
+    日時をエポック秒に変換
+    
+    Args:
+        value: ISO 8601形式の文字列・datetime（タイムゾーンなしはローカル時刻）・エポック秒
+    
+    Returns:
+        エポック秒。Noneや空文字の場合はNone
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        # YouTube APIの日時（末尾がZのUTC）にも対応
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def epoch_to_iso(value: Optional[int]) -> Optional[str]:
+    """
+    エポック秒をISO 8601形式（ローカル時刻）の文字列に変換
+    
+    Args:
+        value: エポック秒
+    
+    Returns:
+        ISO 8601形式の文字列。Noneの場合はNone
+    """
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value).isoformat()
+
+
+def _to_dict(record) -> Dict:
+    """レコードを辞書に変換し、エポック秒の日時をISO 8601形式に戻す"""
+    return {
+        name: epoch_to_iso(getattr(record, name)) if name in TIMESTAMP_FIELDS else getattr(record, name)
+        for name in record.__slots__
+    }
+
+
+class Video:
+    """
+    動画情報のレコード（videosテーブルの1行）
+    
+    created_at / updated_at はエポック秒（int）のまま保持する。
+    """
+    
+    __slots__ = (
+        'video_id', 'title', 'description', 'channel_id', 'channel_title',
+        'published_at', 'duration', 'view_count', 'like_count',
+        'comment_count', 'thumbnail_url', 'tags', 'category_id',
+        'created_at', 'updated_at',
+    )
+    
+    # SELECT文の列順（__slots__と同じ順序）
+    COLUMNS = __slots__
+    
+    def __init__(self, video_id, title, description, channel_id, channel_title,
+                 published_at, duration, view_count, like_count,
+                 comment_count, thumbnail_url, tags, category_id,
+                 created_at, updated_at):
+        self.video_id = video_id
+        self.title = title
+        self.description = description
+        self.channel_id = channel_id
+        self.channel_title = channel_title
+        self.published_at = published_at
+        self.duration = duration
+        self.view_count = view_count
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.thumbnail_url = thumbnail_url
+        self.tags = tags
+        self.category_id = category_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    def to_dict(self) -> Dict:
+        """
+        辞書に変換（get_video / get_all_videos と同じ形式。日時はISO 8601形式の文字列）
+        
+        Returns:
+            動画情報の辞書
+        """
+        return _to_dict(self)
+    
+    def __repr__(self) -> str:
+        return f"Video(video_id={self.video_id!r}, title={self.title!r}, view_count={self.view_count!r})"
+
+
+class StatSnapshot:
+    """
+    統計履歴のレコード（video_statisticsテーブルの1行）
+    
+    recorded_at はエポック秒（int）のまま保持する。
+    """
+    
+    __slots__ = ('video_id', 'view_count', 'like_count', 'comment_count', 'recorded_at')
+    
+    # SELECT文の列順（__slots__と同じ順序）
+    COLUMNS = __slots__
+    
+    def __init__(self, video_id, view_count, like_count, comment_count, recorded_at):
+        self.video_id = video_id
+        self.view_count = view_count
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.recorded_at = recorded_at
+    
+    def to_dict(self) -> Dict:
+        """
+        辞書に変換（get_video_statistics_history と同じ形式。日時はISO 8601形式の文字列）
+        
+        Returns:
+            統計履歴の辞書
+        """
+        return _to_dict(self)
+    
+    def __repr__(self) -> str:
+        return (f"StatSnapshot(video_id={self.video_id!r}, view_count={self.view_count!r}, "
+                f"recorded_at={self.recorded_at!r})")
@@ -0,0 +1,233 @@
+"""
+プロファイリングモジュール
+コマンドの実行をcProfileとスタックのサンプリングで計測し、
+フレームグラフ用のcollapsed形式ファイルと層ごとの集計を出力する
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Tuple
+import config
+
+
+# モジュール（ファイル名）→層
+LAYERS = {
+    'youtube_api.py': 'youtube_api',
+    'api_policy.py': 'youtube_api',
+    'data_manager.py': 'data_manager',
+    'writer.py': 'data_manager',
+    'models.py': 'data_manager',
+    'main.py': 'cli',
+    'server.py': 'cli',
+}
+# 集計の表示順（otherはどの層のコードも経由していない処理）
+LAYER_ORDER = ('youtube_api', 'data_manager', 'cli', 'other')
+
+# フレーム: (ファイル名, 関数名, 関数の開始行)
+Frame = Tuple[str, str, int]
+
+
+class StackSampler:
+    """
+    一定間隔で全スレッドのスタックを記録するサンプリングプロファイラ
+    
+    C拡張（sqlite3・ソケット通信など）の処理時間は、それを呼び出した
+    Pythonの関数のサンプルとして記録される。
+    """
+    
+    def __init__(self, interval: float = None):
+        """
+        初期化
+        
+        Args:
+            interval: サンプリング間隔（秒）
+        """
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        # (スレッド名, フレーム...) → サンプル数（フレームは外側から順）
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """サンプリングを開始"""
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """サンプリングを停止"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self):
+        """サンプリングスレッドの処理"""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._frames(frame)
+                if stack:
+                    self.stacks[(names.get(ident, str(ident)),) + stack] += 1
+    
+    @staticmethod
+    def _frames(frame) -> Tuple[Frame, ...]:
+        """
+        フレームをたどってスタックを作成（このモジュール自身のフレームは除く）
+        
+        Args:
+            frame: 最も内側のフレーム
+        
+        Returns:
+            外側から順に並べたフレームのタプル
+        """
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename != __file__:
+                frames.append((os.path.basename(code.co_filename), code.co_name, code.co_firstlineno))
+            frame = frame.f_back
+        frames.reverse()
+        return tuple(frames)
+    
+    def write_collapsed(self, path: str):
+        """
+        collapsed形式（"スレッド;外側の関数;...;内側の関数 サンプル数"）で保存
+        
+        flamegraph.pl や speedscope などでフレームグラフとして表示できる。
+        
+        Args:
+            path: 出力ファイルのパス
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for (thread_name, *frames), count in sorted(self.stacks.items()):
+                names = [thread_name] + [f"{name} ({filename}:{line})" for filename, name, line in frames]
+                f.write(';'.join(names) + f" {count}\n")
+    
+    def thread_samples(self, thread_name: str) -> Counter:
+        """
+        指定したスレッドのサンプルを取得
+        
+        Args:
+            thread_name: スレッド名
+        
+        Returns:
+            フレームのタプル→サンプル数
+        """
+        samples = Counter()
+        for (name, *frames), count in self.stacks.items():
+            if name == thread_name:
+                samples[tuple(frames)] += count
+        return samples
+
+
+def layer_of(frames: Tuple[Frame, ...]) -> str:
+    """
+    スタックの層を判定（最も内側にあるこのアプリケーションのモジュールの層）
+    
+    Args:
+        frames: 外側から順に並べたフレーム
+    
+    Returns:
+        層の名前（LAYER_ORDERのいずれか）
+    """
+    for filename, _, _ in reversed(frames):
+        if filename in LAYERS:
+            return LAYERS[filename]
+    return 'other'
+
+
+def print_summary(sampler: StackSampler, profile: cProfile.Profile,
+                  elapsed: float, top: int = None):
+    """
+    層ごとの時間と、層ごとに自己時間の長い関数を表示
+    
+    集計はコマンドを実行したメインスレッドのサンプルで行う。
+    
+    Args:
+        sampler: 計測済みのサンプラー
+        profile: 計測済みのcProfile（呼び出し回数の表示に使用）
+        elapsed: 実行時間（秒）
+        top: 層ごとに表示する関数の件数
+    """
+    top = top or config.PROFILE_TOP_N
+    samples = sampler.thread_samples(threading.main_thread().name)
+    total = sum(samples.values())
+    
+    print(f"\nプロファイル結果（実行時間: {elapsed:.2f}秒, サンプル数: {total:,}）")
+    print("=" * 80)
+    
+    if not total:
+        print("サンプルがありません（実行時間が短すぎます）。")
+        return
+    
+    # cProfileの呼び出し回数（ファイル名, 関数名, 開始行）→回数
+    calls = {
+        (os.path.basename(filename), name, line): stat[1]
+        for (filename, line, name), stat in pstats.Stats(profile).stats.items()
+    }
+    
+    by_layer = {layer: Counter() for layer in LAYER_ORDER}
+    for frames, count in samples.items():
+        by_layer[layer_of(frames)][frames[-1]] += count
+    
+    print(f"{'層':<14} {'サンプル':>10} {'割合':>8} {'推定時間':>10}")
+    print("-" * 80)
+    for layer in LAYER_ORDER:
+        count = sum(by_layer[layer].values())
+        print(f"{layer:<14} {count:>10,} {count / total:>8.1%} {elapsed * count / total:>9.2f}秒")
+    
+    for layer in LAYER_ORDER:
+        functions = by_layer[layer]
+        if not functions:
+            continue
+        
+        print(f"\n[{layer}] 自己時間の長い関数:")
+        for (filename, name, line), count in functions.most_common(top):
+            ncalls = calls.get((filename, name, line))
+            ncalls_text = f"  呼び出し {ncalls:,}回" if ncalls is not None else ''
+            print(f"  {count / total:>6.1%}  {name} ({filename}:{line}){ncalls_text}")
+
+
+def run_profiled(func: Callable[[], None], output: str = None, label: str = 'command'):
+    """
+    関数をプロファイリングしながら実行し、結果を保存・表示
+    
+    <output>.prof にcProfileの結果（python -m pstats で参照可能）、
+    <output>.collapsed にフレームグラフ用のスタックを保存する。
+    
+    Args:
+        func: 実行する関数
+        output: 出力ファイルのパス（拡張子なし。省略時は profile-<label>-<日時>）
+        label: 既定の出力ファイル名に含める名前（コマンド名など）
+    """
+    output = output or f"profile-{label}-{datetime.now():%Y%m%d-%H%M%S}"
+    
+    profile = cProfile.Profile()
+    sampler = StackSampler()
+    started = time.perf_counter()
+    
+    sampler.start()
+    profile.enable()
+    try:
+        func()
+    finally:
+        profile.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        
+        try:
+            profile.dump_stats(output + '.prof')
+            sampler.write_collapsed(output + '.collapsed')
+        except OSError as e:
+            print(f"プロファイル結果の保存エラー: {e}")
+        else:
+            print(f"\nプロファイル結果を保存しました: {output}.prof, {output}.collapsed")
+        
+        print_summary(sampler, profile, elapsed)
@@ -0,0 +1,314 @@
+"""
+読み取り専用JSON APIサーバーモジュール
+保存済みの動画情報をローカルHTTPでJSONとして提供する（スタジオのフロントエンド向け）
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+import config
+from data_manager import DataManager
+
+
+class ResponseCache:
+    """
+    レスポンスのキャッシュ
+    
+    データベースの更新バージョン（PRAGMA data_version）が変わるか、
+    invalidate()が呼ばれると全件を破棄する。
+    """
+    
+    def __init__(self, max_entries: int = None):
+        """
+        初期化
+        
+        Args:
+            max_entries: キャッシュする最大件数（超えた場合は古いものから破棄）
+        """
+        self.max_entries = max_entries or config.SERVER_CACHE_SIZE
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, version: Optional[int]) -> Optional[Tuple[bytes, str]]:
+        """
+        キャッシュからレスポンスを取得
+        
+        Args:
+            key: キャッシュキー
+            version: 現在のデータベースの更新バージョン
+        
+        Returns:
+            (本文, ETag)。キャッシュにない場合はNone
+        """
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+                return None
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key: str, version: Optional[int], body: bytes) -> str:
+        """
+        レスポンスをキャッシュに保存
+        
+        Args:
+            key: キャッシュキー
+            version: レスポンス作成時のデータベースの更新バージョン
+            body: レスポンス本文
+        
+        Returns:
+            レスポンスのETag
+        """
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (body, etag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return etag
+    
+    def invalidate(self, *args):
+        """キャッシュをすべて破棄（VideoWriterのon_flushにも指定できる）"""
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryService:
+    """JSON APIのクエリ処理クラス"""
+    
+    # 一覧のソートに使用できる列
+    ORDER_COLUMNS = ('updated_at', 'published_at', 'view_count', 'like_count', 'comment_count')
+    # 現在時刻からの期間で集計するパス（データが変わらなくても結果が変わる）
+    WINDOWED_PATHS = ('api/trending',)
+    
+    def __init__(self, db_path: str = None):
+        """
+        初期化
+        
+        Args:
+            db_path: データベースファイルのパス
+        """
+        self.db = DataManager(db_path, read_only=True)
+        self.cache = ResponseCache()
+        # 共有接続は同時に1リクエストだけが使用する
+        self._db_lock = threading.Lock()
+    
+    def close(self):
+        """データベース接続を閉じる"""
+        self.db.close()
+    
+    def handle(self, path: str, query: str) -> Tuple[int, bytes, Optional[str]]:
+        """
+        リクエストを処理
+        
+        Args:
+            path: リクエストパス
+            query: クエリ文字列
+        
+        Returns:
+            (ステータスコード, JSON本文, ETag)
+        """
+        key = f"{path}?{query}"
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        
+        # 期間の終点を丸めてキャッシュキーに含め、丸めの単位ごとに集計し直す
+        now = int(time.time()) // config.SERVER_WINDOW_SECONDS * config.SERVER_WINDOW_SECONDS
+        if path.strip('/') in self.WINDOWED_PATHS:
+            key += f"#{now}"
+        
+        try:
+            with self._db_lock:
+                version = self.db.get_data_version()
+                cached = self.cache.get(key, version)
+                if cached:
+                    return 200, cached[0], cached[1]
+                
+                result = self._route(path, params, now)
+        except ValueError as e:
+            return 400, self._dumps({'error': str(e)}), None
+        except Exception as e:
+            print(f"APIサーバーエラー: {e}")
+            return 500, self._dumps({'error': 'internal server error'}), None
+        
+        if result is None:
+            return 404, self._dumps({'error': 'not found'}), None
+        
+        body = self._dumps(result)
+        etag = self.cache.put(key, version, body)
+        return 200, body, etag
+    
+    def _route(self, path: str, params: Dict[str, str], now: int) -> Optional[Dict]:
+        """
+        パスに対応するクエリを実行
+        
+        Args:
+            path: リクエストパス
+            params: クエリパラメータ
+            now: 期間の終点（エポック秒、SERVER_WINDOW_SECONDS単位に丸めた現在時刻）
+        
+        Returns:
+            レスポンスの辞書。該当するものがない場合はNone
+        """
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        
+        if parts[:1] != ['api']:
+            return None
+        parts = parts[1:]
+        
+        if parts == ['summary']:
+            return self.db.get_statistics_summary()
+        if parts == ['videos']:
+            return self._list_videos(params)
+        if parts == ['trending']:
+            return self._trending(params, now)
+        if len(parts) == 2 and parts[0] == 'videos':
+            return self.db.get_video(parts[1])
+        if len(parts) == 3 and parts[0] == 'videos' and parts[2] == 'history':
+            return self._history(parts[1], params)
+        
+        return None
+    
+    def _list_videos(self, params: Dict[str, str]) -> Dict:
+        """
+        動画一覧
+        
+        クエリパラメータ: limit, offset, order（ORDER_COLUMNSのいずれか）, desc（0で昇順）
+        """
+        limit = min(int(params.get('limit', 50)), config.SERVER_MAX_LIMIT)
+        offset = int(params.get('offset', 0))
+        if limit < 0 or offset < 0:
+            raise ValueError("limit と offset には0以上の値を指定してください")
+        order = params.get('order', 'updated_at')
+        if order not in self.ORDER_COLUMNS:
+            raise ValueError(f"order は {', '.join(self.ORDER_COLUMNS)} のいずれかを指定してください")
+        direction = 'ASC' if params.get('desc') == '0' else 'DESC'
+        
+        # 並べ替えと読み飛ばしはSQLite側で行う
+        records = self.db.iter_video_records(f'{order} {direction}, video_id', limit, offset)
+        videos = [record.to_dict() for record in records]
+        
+        return {'limit': limit, 'offset': offset, 'videos': videos}
+    
+    def _history(self, video_id: str, params: Dict[str, str]) -> Optional[Dict]:
+        """
+        動画の統計履歴
+        
+        クエリパラメータ: since, until, bucket（hour / day / week）
+        """
+        if not self.db.get_video(video_id):
+            return None
+        
+        since = params.get('since')
+        until = params.get('until')
+        bucket = params.get('bucket')
+        
+        return {
+            'video_id': video_id,
+            'bucket': bucket,
+            'history': self.db.get_statistics_buckets([video_id], bucket, since, until),
+            'growth': self.db.get_statistics_growth([video_id], since, until).get(video_id),
+        }
+    
+    def _trending(self, params: Dict[str, str], now: int) -> Dict:
+        """
+        直近で視聴回数が伸びている動画と急上昇の検知
+        
+        クエリパラメータ: hours（既定24）, limit（既定20）
+        期間は now までの hours 時間（now はキャッシュキーと同じ丸めた時刻）
+        """
+        hours = int(params.get('hours', 24))
+        limit = min(int(params.get('limit', 20)), config.SERVER_MAX_LIMIT)
+        since = datetime.fromtimestamp(now) - timedelta(hours=hours)
+        
+        growth = self.db.get_statistics_growth(since=since)
+        ranked = sorted(growth.items(), key=lambda item: item[1]['view_growth'], reverse=True)[:limit]
+        
+        videos = []
+        for video_id, stats in ranked:
+            video = self.db.get_video(video_id) or {}
+            videos.append(dict(stats, video_id=video_id, title=video.get('title'),
+                               thumbnail_url=video.get('thumbnail_url'),
+                               view_count=video.get('view_count')))
+        
+        return {
+            'hours': hours,
+            'videos': videos,
+            'spikes': self.db.get_spikes(since, limit),
+        }
+    
+    @staticmethod
+    def _dumps(data) -> bytes:
+        """JSON本文を作成"""
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """GETリクエストをQueryServiceに渡すハンドラ"""
+    
+    service: QueryService = None
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        status, body, etag = self.service.handle(url.path, url.query)
+        
+        if etag and etag == self.headers.get('If-None-Match'):
+            self.send_response(304)
+            self._send_common_headers(etag)
+            self.end_headers()
+            return
+        
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self._send_common_headers(etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_common_headers(self, etag: Optional[str]):
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', config.SERVER_CORS_ORIGIN)
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+
+
+def run_server(host: str = None, port: int = None, db_path: str = None):
+    """
+    APIサーバーを起動（Ctrl+Cで停止）
+    
+    Args:
+        host: 待ち受けるホスト
+        port: 待ち受けるポート
+        db_path: データベースファイルのパス
+    """
+    host = host or config.SERVER_HOST
+    port = port or config.SERVER_PORT
+    
+    try:
+        service = QueryService(db_path)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"APIサーバーを起動できません: {e}")
+        return
+    handler = type('RequestHandler', (_RequestHandler,), {'service': service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    
+    print(f"APIサーバーを起動しました: http://{host}:{port}/api/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nAPIサーバーを停止します。")
+    finally:
+        httpd.server_close()
+        service.close()
@@ -0,0 +1,434 @@
+"""
+統計履歴のスナップショットモジュール
+video_statisticsを列ごとの.npyファイル（NumPy形式）に書き出し、
+メモリマップでコピーせずに読み込めるようにする
+"""
+import ast
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+import config
+from data_manager import DataManager
+
+
+# .npyファイルのヘッダー（NPY形式 v1.0）
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+# ヘッダー全体の長さ（行数が増えてもヘッダーを書き換えるだけで済むよう固定長にする）
+NPY_HEADER_SIZE = 128
+
+# 統計の列（すべて符号付き64ビット整数。NULLは-1）
+COLUMNS = ('recorded_at', 'view_count', 'like_count', 'comment_count')
+# 動画ごとの区間（動画の番号, 開始行, 行数）の列
+SEGMENT_COLUMNS = ('segment_video', 'segment_start', 'segment_count')
+
+# スナップショットの形式のバージョン
+# 2: 追記位置を記録日時ではなく統計履歴の書き込み連番（seq）で管理する形式
+SNAPSHOT_VERSION = 2
+
+
+class NpyColumn:
+    """
+    1次元のint64配列を格納する追記可能な.npyファイル
+    
+    データの後ろに追記し、ヘッダーの行数を書き換えることで配列を伸ばす。
+    """
+    
+    def __init__(self, path: str):
+        """
+        初期化（ファイルがなければ空の配列として作成）
+        
+        Args:
+            path: ファイルのパス
+        """
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(self._header(0))
+    
+    @staticmethod
+    def _header(length: int) -> bytes:
+        """
+        ヘッダーを作成
+        
+        Args:
+            length: 配列の要素数
+        
+        Returns:
+            NPY_HEADER_SIZEバイトのヘッダー
+        """
+        fields = f"{{'descr': '<i8', 'fortran_order': False, 'shape': ({length},), }}"
+        size = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+        return NPY_MAGIC + struct.pack('<H', size) + fields.ljust(size - 1).encode('latin1') + b'\n'
+    
+    @staticmethod
+    def read_length(path: str) -> int:
+        """
+        ヘッダーから配列の要素数を取得
+        
+        Args:
+            path: ファイルのパス
+        
+        Returns:
+            配列の要素数
+        
+        Raises:
+            ValueError: このモジュールで作成した形式の.npyファイルでない場合
+        """
+        with open(path, 'rb') as f:
+            header = f.read(NPY_HEADER_SIZE)
+        
+        if len(header) < NPY_HEADER_SIZE or not header.startswith(NPY_MAGIC):
+            raise ValueError(f"スナップショットの形式が正しくありません: {path}")
+        fields = ast.literal_eval(header[len(NPY_MAGIC) + 2:].decode('latin1').strip())
+        if fields.get('descr') != '<i8' or fields.get('fortran_order'):
+            raise ValueError(f"スナップショットの形式が正しくありません: {path}")
+        return fields['shape'][0]
+    
+    def truncate(self, length: int):
+        """
+        配列をlength要素に切り詰める（書き込みが中断した場合の後始末）
+        
+        Args:
+            length: 残す要素数
+        """
+        with open(self.path, 'r+b') as f:
+            f.truncate(NPY_HEADER_SIZE + length * 8)
+    
+    def append(self, values: array):
+        """
+        配列の末尾に追記（ヘッダーの要素数はset_lengthで更新する）
+        
+        Args:
+            values: 追記する値（typecode 'q' のarray）
+        """
+        if sys.byteorder != 'little':
+            values = array('q', values)
+            values.byteswap()
+        with open(self.path, 'ab') as f:
+            values.tofile(f)
+    
+    def set_length(self, length: int):
+        """
+        ヘッダーの要素数を更新
+        
+        Args:
+            length: 配列の要素数
+        """
+        with open(self.path, 'r+b') as f:
+            f.write(self._header(length))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SnapshotWriter:
+    """
+    統計履歴のスナップショットを作成・追記するクラス
+    
+    前回のスナップショット以降に書き込まれた統計履歴だけを書き込み連番（seq）で読み込み、
+    動画ID・記録日時の順に並べて各列の末尾に追記する。
+    連番はコミット順に増えるため、実行中の書き込みや過去の日時で記録された行も取りこぼさない。
+    追記した範囲の動画ごとの開始行と行数を区間として記録するため、
+    読み込み側は動画ごとの行を区間からたどれる。
+    """
+    
+    def __init__(self, db: DataManager, directory: str = None):
+        """
+        初期化
+        
+        Args:
+            db: 読み込み元のDataManager
+            directory: スナップショットを保存するディレクトリ
+        """
+        self.db = db
+        self.directory = directory or config.SNAPSHOT_DIR
+    
+    def update(self, rebuild: bool = False) -> Optional[int]:
+        """
+        スナップショットを作成、または前回以降の統計履歴を追記
+        
+        Args:
+            rebuild: 既存のスナップショットを破棄して作り直す場合True
+                     （区間をまとめて動画ごとに1つにし、削除済みの動画も除く）
+        
+        Returns:
+            追記した行数。失敗した場合はNone
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            meta_path = os.path.join(self.directory, 'meta.json')
+            if rebuild and os.path.exists(meta_path):
+                # 作り直している間は読み込み側からスナップショットがないように見せる
+                os.remove(meta_path)
+            try:
+                meta = read_meta(self.directory)
+            except ValueError as e:
+                print(f"{e}。スナップショットを作り直します。")
+                os.remove(meta_path)
+                meta = None
+            if meta is None:
+                meta = self._empty_meta()
+                for name in COLUMNS + SEGMENT_COLUMNS:
+                    path = self._path(name)
+                    if os.path.exists(path):
+                        os.remove(path)
+            
+            columns = {name: NpyColumn(self._path(name)) for name in COLUMNS}
+            segments = {name: NpyColumn(self._path(name)) for name in SEGMENT_COLUMNS}
+            
+            # メタ情報に記録された行数までが有効なデータ
+            for column in columns.values():
+                column.truncate(meta['rows'])
+            for column in segments.values():
+                column.truncate(meta['segments'])
+            
+            added, added_segments = self._append_rows(meta, columns, segments)
+            
+            rows = meta['rows'] + added
+            segment_count = meta['segments'] + added_segments
+            for column in columns.values():
+                column.set_length(rows)
+            for column in segments.values():
+                column.set_length(segment_count)
+            
+            meta.update(rows=rows, segments=segment_count, updated_at=int(time.time()))
+            self._write_meta(meta)
+            return added
+        
+        except Exception as e:
+            print(f"スナップショット作成エラー: {e}")
+            return None
+    
+    def _append_rows(self, meta: Dict, columns: Dict[str, NpyColumn],
+                     segments: Dict[str, NpyColumn]) -> Tuple[int, int]:
+        """
+        前回以降の統計履歴を各列に追記
+        
+        Args:
+            meta: スナップショットのメタ情報（動画IDの一覧と追記済みの連番を更新する）
+            columns: 統計の列
+            segments: 区間の列
+        
+        Returns:
+            (追記した行数, 追記した区間の数)
+        """
+        video_index = {video_id: i for i, video_id in enumerate(meta['videos'])}
+        buffers = {name: array('q') for name in COLUMNS}
+        segment_buffers = {name: array('q') for name in SEGMENT_COLUMNS}
+        
+        row = meta['rows']
+        added = 0
+        current = None
+        segment_start = row
+        
+        def close_segment():
+            if current is not None and row > segment_start:
+                segment_buffers['segment_video'].append(video_index[current])
+                segment_buffers['segment_start'].append(segment_start)
+                segment_buffers['segment_count'].append(row - segment_start)
+        
+        # 1回の読み取りで見えた最大の連番までは、以降に行が増えることはない
+        last_seq = meta['last_seq']
+        rows = self.db.iter_statistics_rows(last_seq)
+        for video_id, recorded_at, view_count, like_count, comment_count, seq in rows:
+            if seq is not None and (last_seq is None or seq > last_seq):
+                last_seq = seq
+            if video_id != current:
+                close_segment()
+                current = video_id
+                segment_start = row
+                if video_id not in video_index:
+                    video_index[video_id] = len(meta['videos'])
+                    meta['videos'].append(video_id)
+            
+            for name, value in zip(COLUMNS, (recorded_at, view_count, like_count, comment_count)):
+                buffers[name].append(-1 if value is None else value)
+            row += 1
+            added += 1
+            
+            if len(buffers['recorded_at']) >= config.SNAPSHOT_BUFFER_ROWS:
+                for name, buffer in buffers.items():
+                    columns[name].append(buffer)
+                buffers = {name: array('q') for name in COLUMNS}
+        
+        close_segment()
+        
+        for name, buffer in buffers.items():
+            columns[name].append(buffer)
+        for name, buffer in segment_buffers.items():
+            segments[name].append(buffer)
+        
+        # 最初の作成時に連番のない行しかなければ0（以降はすべて連番付きで書き込まれる）
+        meta['last_seq'] = last_seq if last_seq is not None else 0
+        return added, len(segment_buffers['segment_video'])
+    
+    def _write_meta(self, meta: Dict):
+        """
+        メタ情報を保存（書き込み途中の状態が読まれないよう置き換えで保存）
+        
+        Args:
+            meta: メタ情報
+        """
+        path = os.path.join(self.directory, 'meta.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+    
+    def _path(self, name: str) -> str:
+        """列のファイルのパス"""
+        return os.path.join(self.directory, f'{name}.npy')
+    
+    @staticmethod
+    def _empty_meta() -> Dict:
+        """空のスナップショットのメタ情報"""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'rows': 0,
+            'segments': 0,
+            'last_seq': None,
+            'updated_at': None,
+            'videos': [],
+        }
+
+
+def read_meta(directory: str = None) -> Optional[Dict]:
+    """
+    スナップショットのメタ情報を読み込む
+    
+    Args:
+        directory: スナップショットのディレクトリ
+    
+    Returns:
+        メタ情報の辞書（rows, segments, last_seq, updated_at, videos）。
+        スナップショットがない場合はNone
+    
+    Raises:
+        ValueError: 対応していない形式のスナップショットの場合
+    """
+    path = os.path.join(directory or config.SNAPSHOT_DIR, 'meta.json')
+    if not os.path.exists(path):
+        return None
+    
+    with open(path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"対応していないスナップショットの形式です: version {meta.get('version')}")
+    return meta
+
+
+class SnapshotReader:
+    """
+    スナップショットをメモリマップで読み込むクラス
+    
+    各列はファイルをマップしたmemoryview（int64）として参照するため、
+    全体を読み込まずに必要な部分だけがページ単位で読まれる。
+    NumPyを使う場合は np.load(path, mmap_mode='r') でも同じファイルを読み込める。
+    
+    区間は追記した順に並ぶため、過去の日時で後から記録された行や、
+    同じ日時で上書きされた行は、作り直すまで順序が前後したり重複したりすることがある。
+    """
+    
+    def __init__(self, directory: str = None):
+        """
+        初期化
+        
+        Args:
+            directory: スナップショットのディレクトリ
+        
+        Raises:
+            FileNotFoundError: スナップショットがない場合
+            ValueError: 対応していない形式のスナップショットの場合
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("スナップショットのメモリマップ読み込みはリトルエンディアン環境のみ対応しています")
+        
+        self.directory = directory or config.SNAPSHOT_DIR
+        self.meta = read_meta(self.directory)
+        if self.meta is None:
+            raise FileNotFoundError(f"スナップショットがありません: {self.directory}")
+        
+        self.videos = self.meta['videos']
+        self._maps = []
+        self.columns = {name: self._map(name, self.meta['rows']) for name in COLUMNS}
+        segments = {name: self._map(name, self.meta['segments']) for name in SEGMENT_COLUMNS}
+        
+        # 動画ID→区間（開始行, 行数）のリスト（追記順＝記録日時順）
+        self.offsets: Dict[str, List[Tuple[int, int]]] = {}
+        for video, start, count in zip(*(segments[name] for name in SEGMENT_COLUMNS)):
+            self.offsets.setdefault(self.videos[video], []).append((start, count))
+    
+    def _map(self, name: str, length: int) -> memoryview:
+        """
+        列のファイルをメモリマップ
+        
+        Args:
+            name: 列名
+            length: メタ情報に記録された要素数（書き込み途中の行は参照しない）
+        
+        Returns:
+            int64のmemoryview
+        """
+        path = os.path.join(self.directory, f'{name}.npy')
+        if NpyColumn.read_length(path) < length:
+            raise ValueError(f"スナップショットが壊れています: {path}")
+        if length == 0:
+            return memoryview(array('q'))
+        
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)[NPY_HEADER_SIZE:NPY_HEADER_SIZE + length * 8].cast('q')
+    
+    def close(self):
+        """メモリマップを閉じる（取得したmemoryviewは使用できなくなる）"""
+        for view in self.columns.values():
+            view.release()
+        self.columns = {}
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # 呼び出し側がまだmemoryviewを保持している場合は解放時に閉じられる
+                pass
+        self._maps = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
+    def get_video_columns(self, video_id: str) -> Dict[str, List[memoryview]]:
+        """
+        動画の統計履歴を列ごとに取得（コピーしない）
+        
+        Args:
+            video_id: 動画ID
+        
+        Returns:
+            列名→区間ごとのmemoryviewのリスト（古い順）
+        """
+        segments = self.offsets.get(video_id, [])
+        return {
+            name: [column[start:start + count] for start, count in segments]
+            for name, column in self.columns.items()
+        }
+    
+    def iter_video_history(self, video_id: str) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        動画の統計履歴を古い順に取得
+        
+        Args:
+            video_id: 動画ID
+        
+        Yields:
+            (recorded_at, view_count, like_count, comment_count)。NULLは-1
+        """
+        columns = [self.columns[name] for name in COLUMNS]
+        for start, count in self.offsets.get(video_id, []):
+            for row in range(start, start + count):
+                yield tuple(column[row] for column in columns)
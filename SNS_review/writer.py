@@ -0,0 +1,129 @@
+"""
+書き込みバッファモジュール
+取得した動画情報を専用スレッドでまとめてデータベースに書き込む（ライトビハインド）
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+import config
+from data_manager import DataManager
+
+
+class VideoWriter:
+    """
+    動画情報のライトビハインド書き込みクラス
+    
+    put()で受け取った動画情報を上限付きキューに溜め、専用スレッドが
+    件数または経過時間の上限に達するたびに1トランザクションで保存する。
+    データベースへの書き込みはこのスレッドだけが行う。
+    キューが満杯の場合put()はブロックする（バックプレッシャー）。
+    """
+    
+    # スレッド停止の合図
+    _STOP = object()
+    
+    def __init__(self, db: DataManager, batch_size: int = None,
+                 flush_interval: float = None, queue_size: int = None,
+                 on_flush: Callable[[List[Dict]], None] = None):
+        """
+        初期化
+        
+        Args:
+            db: 書き込み先のDataManager
+            batch_size: 1トランザクションで保存する最大件数
+            flush_interval: 溜まった動画情報を保存するまでの最大待ち時間（秒）
+            queue_size: キューに溜められる最大件数
+            on_flush: 保存に成功するたびに呼び出す関数（保存した動画情報のリストを受け取る）
+                      読み取り側のキャッシュ無効化などに使用する
+        """
+        self.db = db
+        self.on_flush = on_flush
+        self.batch_size = batch_size or config.WRITER_BATCH_SIZE
+        self.flush_interval = flush_interval or config.WRITER_FLUSH_INTERVAL
+        self.queue = queue.Queue(maxsize=queue_size or config.WRITER_QUEUE_SIZE)
+        self.written = 0
+        self.failed = 0
+        self._thread = None
+    
+    def start(self):
+        """書き込みスレッドを開始"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='VideoWriter', daemon=True)
+        self._thread.start()
+    
+    def put(self, video_info: Dict):
+        """
+        動画情報を書き込みキューに追加
+        
+        Args:
+            video_info: 動画情報の辞書
+        """
+        if self._thread is None:
+            raise RuntimeError("VideoWriterが開始されていません。")
+        self.queue.put(video_info)
+    
+    def close(self):
+        """キューに残った動画情報をすべて保存してからスレッドを停止"""
+        if self._thread is None:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _run(self):
+        """書き込みスレッドのメインループ"""
+        pending = []
+        deadline = None
+        
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                # 待ち時間の上限に達したので保存
+                self._flush(pending)
+                pending = []
+                deadline = None
+                continue
+            
+            if item is self._STOP:
+                self._flush(pending)
+                return
+            
+            pending.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            
+            if len(pending) >= self.batch_size:
+                self._flush(pending)
+                pending = []
+                deadline = None
+    
+    def _flush(self, pending: List[Dict]):
+        """
+        溜まった動画情報を1トランザクションで保存
+        
+        Args:
+            pending: 保存する動画情報のリスト
+        """
+        if not pending:
+            return
+        
+        saved = self.db.save_videos(pending)
+        self.written += saved
+        self.failed += len(pending) - saved
+        
+        if saved and self.on_flush:
+            try:
+                self.on_flush(pending)
+            except Exception as e:
+                print(f"書き込み後の通知エラー: {e}")
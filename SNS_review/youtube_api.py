@@ -4,19 +4,23 @@ YouTube Data API v3を使用して動画情報を取得するモジュール
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import config
-from typing import Dict, Optional, List
+from api_policy import CircuitOpenError, RequestPolicy, FATAL, TRANSIENT
+from models import to_epoch
+from typing import Callable, Dict, Optional, List, Tuple
 
 
 class YouTubeAPI:
     """YouTube Data API v3のラッパークラス"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, policy: RequestPolicy = None):
         """
         初期化
         
         Args:
             api_key: YouTube Data API v3のAPIキー
+            policy: 再試行・サーキットブレーカーのポリシー（省略時は設定値で作成）
         """
+        self.policy = policy or RequestPolicy()
         self.api_key = api_key or config.YOUTUBE_API_KEY
         if not self.api_key:
             raise ValueError("YouTube APIキーが設定されていません。config.pyまたは環境変数YOUTUBE_API_KEYを設定してください。")
@@ -27,6 +31,11 @@ class YouTubeAPI:
             developerKey=self.api_key
         )
     
+    @property
+    def circuit_open(self) -> bool:
+        """クォータ超過・認証エラーによりAPIの呼び出しを停止している場合True"""
+        return self.policy.circuit_open
+    
     def get_video_info(self, video_id: str) -> Optional[Dict]:
         """
         動画IDから動画情報を取得
@@ -43,39 +52,19 @@ class YouTubeAPI:
                 part='snippet,statistics,contentDetails',
                 id=video_id
             )
-            response = request.execute()
+            response = self.policy.execute(request)
             
             if not response.get('items'):
                 print(f"動画ID {video_id} が見つかりませんでした。")
                 return None
             
-            item = response['items'][0]
-            snippet = item['snippet']
-            statistics = item['statistics']
-            content_details = item['contentDetails']
-            
-            # 動画の長さを秒に変換
-            duration = self._parse_duration(content_details.get('duration', 'PT0S'))
-            
-            # 動画情報を整理
-            video_info = {
-                'video_id': video_id,
-                'title': snippet.get('title', ''),
-                'description': snippet.get('description', ''),
-                'channel_id': snippet.get('channelId', ''),
-                'channel_title': snippet.get('channelTitle', ''),
-                'published_at': snippet.get('publishedAt', ''),
-                'duration': duration,
-                'view_count': int(statistics.get('viewCount', 0)),
-                'like_count': int(statistics.get('likeCount', 0)),
-                'comment_count': int(statistics.get('commentCount', 0)),
-                'thumbnail_url': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-                'tags': ','.join(snippet.get('tags', [])),
-                'category_id': snippet.get('categoryId', ''),
-            }
+            video_info = self._parse_video_item(response['items'][0])
             
             return video_info
             
+        except CircuitOpenError as e:
+            print(f"APIの呼び出しを停止中のため取得できませんでした: {e}")
+            return None
         except HttpError as e:
             print(f"APIエラーが発生しました: {e}")
             return None
@@ -98,25 +87,18 @@ class YouTubeAPI:
                 part='snippet,statistics',
                 id=channel_id
             )
-            response = request.execute()
+            response = self.policy.execute(request)
             
             if not response.get('items'):
                 return None
             
-            item = response['items'][0]
-            snippet = item['snippet']
-            statistics = item['statistics']
-            
-            channel_info = {
-                'channel_id': channel_id,
-                'channel_title': snippet.get('title', ''),
-                'subscriber_count': int(statistics.get('subscriberCount', 0)),
-                'video_count': int(statistics.get('videoCount', 0)),
-                'view_count': int(statistics.get('viewCount', 0)),
-            }
+            channel_info = self._parse_channel_item(response['items'][0])
             
             return channel_info
             
+        except CircuitOpenError as e:
+            print(f"APIの呼び出しを停止中のため取得できませんでした: {e}")
+            return None
         except HttpError as e:
             print(f"APIエラーが発生しました: {e}")
             return None
@@ -144,17 +126,18 @@ class YouTubeAPI:
                 videoDuration='short',  # Shorts動画のみ
                 order='viewCount'  # 視聴回数順
             )
-            response = request.execute()
+            response = self.policy.execute(request)
             
-            videos = []
-            for item in response.get('items', []):
-                video_id = item['id']['videoId']
-                video_info = self.get_video_info(video_id)
-                if video_info:
-                    videos.append(video_info)
+            # 検索結果の詳細情報はバッチでまとめて取得
+            video_ids = [item['id']['videoId'] for item in response.get('items', [])]
+            video_infos, _ = self.batch_get_info(video_ids=video_ids)
             
-            return videos
+            # 検索結果の順序（視聴回数順）を維持
+            return [video_infos[video_id] for video_id in video_ids if video_id in video_infos]
             
+        except CircuitOpenError as e:
+            print(f"APIの呼び出しを停止中のため検索できませんでした: {e}")
+            return []
         except HttpError as e:
             print(f"APIエラーが発生しました: {e}")
             return []
@@ -162,6 +145,331 @@ class YouTubeAPI:
             print(f"エラーが発生しました: {e}")
             return []
     
+    def batch_get_info(self, video_ids: List[str] = None, channel_ids: List[str] = None,
+                       on_video: Callable[[Dict], None] = None) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        動画情報とチャンネル情報をバッチリクエストでまとめて取得
+        
+        videos.list / channels.list の呼び出しを1回のマルチパートHTTP通信にまとめる。
+        一時的なエラーのリクエストは再試行し、それ以外のエラーはそのリクエスト分だけを
+        スキップして他の結果は返す。
+        
+        Args:
+            video_ids: 動画IDのリスト
+            channel_ids: チャンネルIDのリスト
+            on_video: 動画情報を取得するたびに呼び出す関数（バッチ通信ごとに、
+                      残りの取得を待たずに呼び出される。保存処理の並行実行に使用する）
+        
+        Returns:
+            (動画ID→動画情報の辞書, チャンネルID→チャンネル情報の辞書)
+            取得できなかったIDは含まれない
+        """
+        videos = {}
+        channels = {}
+        
+        calls = []
+        for i, chunk in enumerate(self._chunks(video_ids or [], config.BATCH_MAX_IDS_PER_REQUEST)):
+            request = self.youtube.videos().list(
+                part='snippet,statistics,contentDetails',
+                id=','.join(chunk),
+                maxResults=len(chunk)
+            )
+            handler = self._make_items_handler(videos, self._parse_video_item, 'video_id', on_video)
+            calls.append((f'videos-{i}', request, handler))
+        
+        for i, chunk in enumerate(self._chunks(channel_ids or [], config.BATCH_MAX_IDS_PER_REQUEST)):
+            request = self.youtube.channels().list(
+                part='snippet,statistics',
+                id=','.join(chunk),
+                maxResults=len(chunk)
+            )
+            calls.append((f'channels-{i}', request, self._make_items_handler(channels, self._parse_channel_item, 'channel_id')))
+        
+        for request_id, exception in self._execute_batch(calls).items():
+            if self.policy.classify(exception) != FATAL:
+                print(f"APIエラーが発生しました (バッチ内リクエスト {request_id}): {exception}")
+        
+        return videos, channels
+    
+    def batch_get_new_comments(self, since: Dict[str, Optional[int]],
+                               page_tokens: Dict[str, str] = None,
+                               max_pages: int = None) -> Dict[str, Dict]:
+        """
+        複数の動画の新しいコメントスレッドをバッチリクエストでまとめて取得
+        
+        commentThreads.listを新しい順に取得し、前回取得済みの日時より古いコメントに
+        到達した動画はそこでページ送りを止める。各ラウンドでは続きのページが必要な
+        動画の分だけを1回のバッチ通信にまとめて送信する。
+        最大ページ数に達した動画は続きのページトークンを返すため、次回はそこから再開できる。
+        
+        Args:
+            since: 動画ID→前回取得した最新コメントの投稿日時（エポック秒。未取得の場合はNone）
+            page_tokens: 動画ID→前回の続きのページトークン（指定した動画はそのページから取得）
+            max_pages: 1動画あたりに取得する最大ページ数
+        
+        Returns:
+            動画ID→取得結果の辞書。取得結果は以下を含む辞書:
+            comments（新しいコメント情報のリスト。新しい順）,
+            next_page_token（最大ページ数に達して前回の位置まで取得できなかった場合の
+            続きのページトークン。取得し終えた場合はNone）
+            取得に失敗した動画は含まれない
+        """
+        max_pages = max_pages or config.COMMENT_MAX_PAGES
+        page_tokens = page_tokens or {}
+        results = {video_id: [] for video_id in since}
+        failed = set()
+        capped = {}  # 動画ID→最大ページ数に達した時点の次のページトークン
+        pages = dict.fromkeys(since, 0)
+        pending = {video_id: page_tokens.get(video_id) for video_id in since}  # 動画ID→次のページトークン
+        
+        while pending:
+            next_pending = {}
+            
+            def make_handler(video_id):
+                def handler(response):
+                    pages[video_id] += 1
+                    reached = False
+                    for item in response.get('items', []):
+                        try:
+                            comment = self._parse_comment_item(item)
+                        except Exception as e:
+                            print(f"レスポンスの解析に失敗しました ({item.get('id')}): {e}")
+                            continue
+                        
+                        # 同じ秒の投稿を取りこぼさないよう、前回と同時刻のものは含める（保存時に重複は上書き）
+                        if since[video_id] is not None and to_epoch(comment['published_at']) < since[video_id]:
+                            reached = True
+                            break
+                        results[video_id].append(comment)
+                    
+                    page_token = response.get('nextPageToken')
+                    if page_token and not reached:
+                        if pages[video_id] < max_pages:
+                            next_pending[video_id] = page_token
+                        else:
+                            capped[video_id] = page_token
+                
+                return handler
+            
+            calls = []
+            for video_id, page_token in pending.items():
+                params = {
+                    'part': 'snippet',
+                    'videoId': video_id,
+                    'order': 'time',
+                    'maxResults': 100,
+                    'textFormat': 'plainText',
+                }
+                if page_token:
+                    params['pageToken'] = page_token
+                calls.append((video_id, self.youtube.commentThreads().list(**params), make_handler(video_id)))
+            
+            for video_id, exception in self._execute_batch(calls).items():
+                if self.policy.error_reason(exception) == 'commentsDisabled':
+                    # コメントが無効な動画は取得済み（0件）として扱う
+                    continue
+                if self.policy.classify(exception) != FATAL:
+                    print(f"APIエラーが発生しました (コメント取得 {video_id}): {exception}")
+                failed.add(video_id)
+            
+            pending = {video_id: token for video_id, token in next_pending.items() if video_id not in failed}
+        
+        return {
+            video_id: {'comments': comments, 'next_page_token': capped.get(video_id)}
+            for video_id, comments in results.items() if video_id not in failed
+        }
+    
+    def _execute_batch(self, calls: List[Tuple[str, object, Callable[[Dict], None]]]) -> Dict[str, Exception]:
+        """
+        リクエストをバッチでまとめて送信し、成功したレスポンスを各ハンドラに渡す
+        
+        一時的なエラーになったリクエストだけを集めてバックオフ後に再送する。
+        クォータ超過・認証エラーではサーキットブレーカーを開き、残りは送信しない。
+        
+        Args:
+            calls: (リクエストID, HttpRequest, レスポンスを受け取る関数) のリスト
+                   リクエストIDは同じ呼び出し内で一意であること
+        
+        Returns:
+            失敗したリクエストID→エラーの辞書（送信しなかったものはCircuitOpenError）
+        """
+        failures = {}
+        pending = list(calls)
+        attempt = 0
+        
+        while pending and not self.policy.circuit_open:
+            retry = []
+            
+            # 1回のバッチに含めるリクエスト数には上限があるため分割して送信
+            for batch_calls in self._chunks(pending, config.BATCH_MAX_REQUESTS):
+                if self.policy.circuit_open:
+                    retry.extend(batch_calls)
+                    continue
+                
+                outcomes = {}
+                
+                def callback(request_id, response, exception):
+                    outcomes[request_id] = (response, exception)
+                
+                batch = self.youtube.new_batch_http_request()
+                for request_id, request, _ in batch_calls:
+                    batch.add(request, callback=callback, request_id=request_id)
+                
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # バッチ全体の失敗は含まれるすべてのリクエストの失敗として扱う
+                    for request_id, _, _ in batch_calls:
+                        outcomes.setdefault(request_id, (None, e))
+                
+                for call in batch_calls:
+                    request_id, _, handler = call
+                    response, exception = outcomes.get(request_id, (None, None))
+                    
+                    if exception is None and response is not None:
+                        handler(response)
+                        continue
+                    if exception is None:
+                        exception = RuntimeError('バッチのレスポンスがありません')
+                    
+                    kind = self.policy.classify(exception)
+                    if kind == TRANSIENT and attempt + 1 < self.policy.max_attempts:
+                        retry.append(call)
+                        continue
+                    if kind == FATAL:
+                        self.policy.trip(exception)
+                    failures[request_id] = exception
+            
+            pending = retry
+            if pending and not self.policy.circuit_open:
+                attempt += 1
+                self.policy.backoff(attempt)
+        
+        for request_id, _, _ in pending:
+            failures[request_id] = CircuitOpenError(self.policy.open_reason)
+        
+        return failures
+    
+    def _make_items_handler(self, results: Dict[str, Dict], parse: Callable[[Dict], Dict], key: str,
+                            on_item: Callable[[Dict], None] = None):
+        """
+        レスポンスのitemsを解析して結果辞書に格納するハンドラを作成
+        
+        Args:
+            results: 解析結果を格納する辞書
+            parse: レスポンスのitemを情報辞書に変換する関数
+            key: 結果辞書のキーにする項目名
+            on_item: 解析した情報を受け取る関数（省略可）
+        
+        Returns:
+            レスポンスを受け取る関数
+        """
+        def handler(response):
+            for item in response.get('items', []):
+                try:
+                    info = parse(item)
+                except Exception as e:
+                    print(f"レスポンスの解析に失敗しました ({item.get('id')}): {e}")
+                    continue
+                results[info[key]] = info
+                if on_item:
+                    on_item(info)
+        
+        return handler
+    
+    def _parse_video_item(self, item: Dict) -> Dict:
+        """
+        videos.listのitemを動画情報の辞書に変換
+        
+        Args:
+            item: APIレスポンスのitem
+        
+        Returns:
+            動画情報の辞書
+        """
+        snippet = item['snippet']
+        statistics = item['statistics']
+        content_details = item['contentDetails']
+        
+        # 動画の長さを秒に変換
+        duration = self._parse_duration(content_details.get('duration', 'PT0S'))
+        
+        # 動画情報を整理
+        return {
+            'video_id': item['id'],
+            'title': snippet.get('title', ''),
+            'description': snippet.get('description', ''),
+            'channel_id': snippet.get('channelId', ''),
+            'channel_title': snippet.get('channelTitle', ''),
+            'published_at': snippet.get('publishedAt', ''),
+            'duration': duration,
+            'view_count': int(statistics.get('viewCount', 0)),
+            'like_count': int(statistics.get('likeCount', 0)),
+            'comment_count': int(statistics.get('commentCount', 0)),
+            'thumbnail_url': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+            'tags': ','.join(snippet.get('tags', [])),
+            'category_id': snippet.get('categoryId', ''),
+        }
+    
+    def _parse_channel_item(self, item: Dict) -> Dict:
+        """
+        channels.listのitemをチャンネル情報の辞書に変換
+        
+        Args:
+            item: APIレスポンスのitem
+        
+        Returns:
+            チャンネル情報の辞書
+        """
+        snippet = item['snippet']
+        statistics = item['statistics']
+        
+        return {
+            'channel_id': item['id'],
+            'channel_title': snippet.get('title', ''),
+            'subscriber_count': int(statistics.get('subscriberCount', 0)),
+            'video_count': int(statistics.get('videoCount', 0)),
+            'view_count': int(statistics.get('viewCount', 0)),
+        }
+    
+    def _parse_comment_item(self, item: Dict) -> Dict:
+        """
+        commentThreads.listのitemをコメント情報の辞書に変換
+        
+        Args:
+            item: APIレスポンスのitem
+        
+        Returns:
+            コメント情報の辞書
+        """
+        snippet = item['snippet']
+        comment = snippet['topLevelComment']['snippet']
+        
+        return {
+            'comment_id': item['id'],
+            'video_id': snippet.get('videoId', comment.get('videoId', '')),
+            'author': comment.get('authorDisplayName', ''),
+            'text': comment.get('textDisplay', ''),
+            'like_count': int(comment.get('likeCount', 0)),
+            'reply_count': int(snippet.get('totalReplyCount', 0)),
+            'published_at': comment.get('publishedAt', ''),
+            'updated_at': comment.get('updatedAt', ''),
+        }
+    
+    @staticmethod
+    def _chunks(items: List, size: int) -> List[List]:
+        """
+        リストを指定サイズごとに分割
+        
+        Args:
+            items: 分割するリスト
+            size: 1チャンクの最大要素数
+        
+        Returns:
+            分割されたリストのリスト
+        """
+        return [items[i:i + size] for i in range(0, len(items), size)]
+    
     def _parse_duration(self, duration: str) -> int:
         """
         ISO 8601形式の動画の長さを秒に変換